@@ -21,7 +21,8 @@ options:
     description:
       - cloudscale.ch API token.
       - This can also be passed in the C(CLOUDSCALE_API_TOKEN) environment variable.
-    required: true
+      - Required, unless the module runs over the C(ansible.netcommon.httpapi) connection with the
+        C(cloudscale_ch.cloud.cloudscale) httpapi plugin holding the API token.
     type: str
   api_timeout:
     description:
@@ -29,9 +30,101 @@ options:
       - This can also be passed in the C(CLOUDSCALE_API_TIMEOUT) environment variable.
     default: 45
     type: int
+  api_keep_alive:
+    description:
+      - Reuse one keep-alive connection per API host for all calls made during
+        a module run, instead of opening a new connection for every call.
+      - Proxy settings from the environment are not used for keep-alive connections.
+      - This can also be passed in the C(CLOUDSCALE_API_KEEP_ALIVE) environment variable.
+    default: false
+    type: bool
+    version_added: 2.6.0
+  api_response_cache:
+    description:
+      - Keep the responses of GET requests with an C(ETag) or C(Last-Modified) header in files shared by the tasks running
+        on the same host, and revalidate them with conditional requests instead of downloading them again.
+      - Within a task, such responses are always revalidated from memory.
+      - The files are stored in C(~/.ansible/cache/cloudscale_ch) or the directory set in the C(CLOUDSCALE_CACHE_DIR)
+        environment variable, readable by the owner only. Note that they may contain secrets like the keys of objects users.
+      - This can also be passed in the C(CLOUDSCALE_API_RESPONSE_CACHE) environment variable.
+    default: false
+    type: bool
+    version_added: 2.6.0
+  api_retries:
+    description:
+      - Number of times a request is retried if the API throttles it with C(429 Too Many Requests), honoring its
+        C(Retry-After) header.
+      - C(GET), C(HEAD), C(PUT) and C(DELETE) requests are retried on connection failures and on the responses C(502), C(503) and
+        C(504) as well.
+      - Without a C(Retry-After) header, the interval between the retries grows exponentially.
+      - This can also be passed in the C(CLOUDSCALE_API_RETRIES) environment variable.
+    default: 3
+    type: int
+    version_added: 2.6.0
+  api_rate_limit:
+    description:
+      - Maximum number of requests per second sent to the API, shared by all tasks using the same API token on the host,
+        e.g. by all forks of a play.
+      - The budget is kept in a locked file in C(~/.ansible/cache/cloudscale_ch) or the directory set in the
+        C(CLOUDSCALE_CACHE_DIR) environment variable.
+      - A throttled request holds back the requests of all these tasks until the time told by the API passed.
+      - Unlimited if not set.
+      - This can also be passed in the C(CLOUDSCALE_API_RATE_LIMIT) environment variable.
+    type: float
+    version_added: 2.6.0
+  api_stats:
+    description:
+      - Return the timings of the API requests of the task in C(api_stats), to find out where the time of slow tasks goes.
+      - C(api_stats.requests) lists every request with its C(method), C(path), C(status), the C(bytes) read and the wall
+        C(time) in seconds spent sending it and reading its response.
+      - Totals are returned in C(request_count), C(request_time), C(bytes), C(retries), C(retry_time), C(rate_limit_time)
+        and C(total_time), along with the C(connections) opened and reused, the C(wait_polls) and C(wait_time) spent waiting
+        for state changes and, for lookups by name, the C(query) strategy used and the resources scanned.
+      - This can also be passed in the C(CLOUDSCALE_API_STATS) environment variable.
+    default: false
+    type: bool
+    version_added: 2.6.0
 notes:
   - All operations are performed using the cloudscale.ch public API v1.
   - "For details consult the full API documentation: U(https://www.cloudscale.ch/en/api/v1)."
   - A valid API token is required for all operations. You can create as many tokens as you like using the cloudscale.ch control panel at
     U(https://control.cloudscale.ch).
+  - Responses are requested gzip compressed and decompressed while they are read. Their compressed and uncompressed sizes are
+    logged in the module debug output.
+  - With the C(ansible.netcommon.httpapi) connection and the C(cloudscale_ch.cloud.cloudscale) httpapi plugin, all requests are sent
+    through the persistent connection of the host. This requires the C(ansible.netcommon) collection.
+'''
+
+    WAIT = '''
+options:
+  wait:
+    description:
+      - Wait for the resource to reach the state requested, instead of returning right after the API accepted the
+        request.
+      - Use the M(cloudscale_ch.cloud.wait) module to wait for the resources later on.
+    default: true
+    type: bool
+    version_added: 2.6.0
+  wait_timeout:
+    description:
+      - Timeout in seconds to wait for a state change of the resource.
+      - Defaults to twice the I(api_timeout).
+      - Must be greater than 0.
+    type: int
+    version_added: 2.6.0
+  poll_interval:
+    description:
+      - Initial interval in seconds between polls while waiting for a state change.
+      - The interval grows exponentially with some random jitter, up to I(poll_max_interval).
+      - Must be greater than 0.
+    default: 0.5
+    type: float
+    version_added: 2.6.0
+  poll_max_interval:
+    description:
+      - Maximum interval in seconds between polls while waiting for a state change.
+      - Must be greater than 0.
+    default: 10.0
+    type: float
+    version_added: 2.6.0
 '''
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+DOCUMENTATION = r'''
+---
+name: cloudscale
+short_description: HttpApi plugin for the cloudscale.ch API
+description:
+  - Lets the cloudscale.ch modules send their requests to the API through the persistent connection of
+    C(ansible.netcommon.httpapi), so that the connection and the API token are shared by all tasks of a host.
+  - Requires the C(ansible.netcommon) collection, which is only needed when using this plugin.
+author:
+  - René Moser (@resmo)
+version_added: 2.6.0
+options:
+  api_token:
+    description:
+      - cloudscale.ch API token used for all requests.
+      - The I(api_token) of a module takes precedence, if set.
+    type: str
+    env:
+      - name: CLOUDSCALE_API_TOKEN
+    vars:
+      - name: ansible_httpapi_cloudscale_api_token
+notes:
+  - Set C(ansible_connection=ansible.netcommon.httpapi), C(ansible_network_os=cloudscale_ch.cloud.cloudscale),
+    C(ansible_host=api.cloudscale.ch) and C(ansible_httpapi_use_ssl=true) on the host running the modules.
+  - The host of the I(api_url) given to the modules is ignored, only its path is used.
+'''
+
+import json
+
+from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_text
+from ansible.module_utils.connection import ConnectionError
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils.api import VALID_TOKEN
+
+try:
+    from ansible_collections.ansible.netcommon.plugins.plugin_utils.httpapi_base import HttpApiBase
+    HAS_NETCOMMON = True
+except ImportError:
+    # Not a dependency of the collection, only needed when using the plugin
+    HttpApiBase = object
+    HAS_NETCOMMON = False
+
+
+class HttpApi(HttpApiBase):
+
+    def __init__(self, connection):
+        if not HAS_NETCOMMON:
+            raise AnsibleError('The cloudscale httpapi plugin requires the ansible.netcommon collection.')
+        super(HttpApi, self).__init__(connection)
+
+    def send_request(self, data, method='GET', path='/', headers=None):
+        """ Sends a request to the API and returns its status, headers and
+        body, for error responses too.
+
+        """
+        headers = dict(headers or {})
+        if 'Authorization' not in headers:
+            api_token = (self.get_option('api_token') or '').strip()
+            if not VALID_TOKEN.match(api_token):
+                raise ConnectionError('Invalid API Token')
+            headers['Authorization'] = 'Bearer %s' % api_token
+
+        response, response_data = self.connection.send(path, data, method=method, headers=headers)
+
+        return {
+            'status': response.getcode(),
+            'headers': dict((k.lower(), v) for k, v in response.headers.items()),
+            'body': to_text(response_data.getvalue(), errors='surrogate_or_strict'),
+        }
+
+    def handle_httperror(self, exc):
+        # Error responses are evaluated by the modules
+        return exc
+
+    def update_auth(self, response, response_text):
+        # The API token is sent with every request, there is no session
+        return None
+
+    def logout(self):
+        pass
+
+    def get_capabilities(self):
+        return json.dumps({'network_api': 'cloudscale'})
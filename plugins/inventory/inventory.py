@@ -17,18 +17,63 @@ description:
     - Uses an YAML configuration file ending with either I(cloudscale.yml) or I(cloudscale.yaml) to set parameter values (also see examples).
 extends_documentation_fragment:
   - constructed
+  - inventory_cache
 options:
     api_token:
         description:
           - cloudscale.ch API token.
           - This can also be passed in the C(CLOUDSCALE_API_TOKEN) environment variable.
         type: str
+    api_url:
+        description:
+          - cloudscale.ch API URL.
+        type: str
+        default: https://api.cloudscale.ch/v1
+        env:
+          - name: CLOUDSCALE_API_URL
+        version_added: 2.6.0
+    projects:
+        description:
+          - Fetch the servers of several cloudscale.ch projects concurrently,
+            instead of the single project of I(api_token).
+          - Servers with the same name in different projects are added by
+            UUID, like servers with the same name in one project.
+        type: list
+        elements: dict
+        suboptions:
+            api_token:
+                description:
+                  - API token of the project.
+                  - This may be a template, for example a lookup of an
+                    environment variable.
+                type: str
+                required: true
+            api_url:
+                description:
+                  - API URL of the project, defaults to I(api_url).
+                type: str
+            group_prefix:
+                description:
+                  - Prefix of the names of the groups created by I(groups) and
+                    I(keyed_groups) for the servers of this project, separated
+                    by an underscore.
+                type: str
+                default: ''
+        version_added: 2.6.0
+    max_workers:
+        description: |
+            Maximum number of API requests sent concurrently to fetch the
+            servers and included resources of all I(projects).
+            Must be at least 1.
+        type: int
+        default: 8
+        version_added: 2.6.0
     plugin:
         description: |
             Token that ensures this is a source file for the 'cloudscale'
             plugin.
         required: True
-        choices: ['cloudscale']
+        choices: ['cloudscale', 'cloudscale_ch.cloud.inventory']
     inventory_hostname:
         description: |
             What to register as the inventory hostname.
@@ -54,6 +99,70 @@ options:
             - private
             - none
         default: public_v4
+    address_vars:
+        description: |
+            Set the addresses of each server as variables of its host.
+            C(cloudscale_public_v4), C(cloudscale_public_v6) and
+            C(cloudscale_private_v4) are the first address of the kind, if
+            the server has one. C(cloudscale_public_ips) and
+            C(cloudscale_private_ips) are the lists of all addresses of the
+            public and private interfaces.
+            Like ansible_host, they are set before the fields are limited by
+            I(hostvar_fields), and can be used in I(compose), I(groups) and
+            I(keyed_groups).
+        type: bool
+        default: false
+        version_added: 2.6.0
+    filters:
+        description: |
+            Only add the servers matching all of the given filters to the
+            inventory.
+            C(tags) is a dict of tags the servers must have, it is passed to
+            the API so that only the matching servers are transferred. A tag
+            with an empty value matches any value.
+            C(name) is a list of shell-style patterns of which the server name
+            must match one. C(zone) and C(status) are lists of zone slugs and
+            server statuses to match. These are checked while the response is
+            parsed.
+        type: dict
+        default: {}
+        version_added: 2.6.0
+    hostvar_fields:
+        description: |
+            Limit the C(cloudscale) variable of each host to the given fields
+            of the server, to reduce the memory used by large inventories.
+            C(include) is a list of the fields to keep, all fields are kept
+            if it is not given. C(exclude) is a list of the fields to remove.
+            Nested fields are given as dotted paths, like C(image.slug). Paths
+            through lists apply to every list element, like
+            C(interfaces.addresses.address) or C(interfaces[].type).
+            The ansible_host variable is set before the fields are limited.
+        type: dict
+        default: {}
+        version_added: 2.6.0
+    include_floating_ips:
+        description: |
+            Fetch the floating IPs and add the ones assigned to a server as
+            list to its C(cloudscale.floating_ips) variable.
+        type: bool
+        default: false
+        version_added: 2.6.0
+    include_volumes:
+        description: |
+            Fetch the volumes and add their details, like name and tags, to
+            the entries of the C(cloudscale.volumes) variable of the servers
+            they are attached to.
+        type: bool
+        default: false
+        version_added: 2.6.0
+    include_server_groups:
+        description: |
+            Fetch the server groups and add their details, like type and
+            tags, to the entries of the C(cloudscale.server_groups) variable
+            of their servers.
+        type: bool
+        default: false
+        version_added: 2.6.0
 '''
 
 EXAMPLES = r'''
@@ -73,16 +182,126 @@ plugin: cloudscale_ch.cloud.inventory
 keyed_groups:
   - prefix: os
     key: cloudscale.image.operating_system | lower
+
+# Example limited to the running production servers in lpg1
+plugin: cloudscale_ch.cloud.inventory
+filters:
+  tags:
+    env: prod
+  zone:
+    - lpg1
+  status:
+    - running
+
+# Example grouping by the tags of the attached floating IPs
+plugin: cloudscale_ch.cloud.inventory
+include_floating_ips: true
+keyed_groups:
+  - prefix: fip
+    key: cloudscale.floating_ips | map(attribute='tags.role') | list
+
+# Example keeping only the fields needed for grouping
+plugin: cloudscale_ch.cloud.inventory
+hostvar_fields:
+  include:
+    - name
+    - uuid
+    - tags
+    - zone.slug
+    - image.operating_system
+    - interfaces.addresses.address
+keyed_groups:
+  - prefix: os
+    key: cloudscale.image.operating_system | lower
+
+# Example setting the addresses as variables and grouping by private network
+plugin: cloudscale_ch.cloud.inventory
+address_vars: true
+groups:
+  private: cloudscale_private_ips | length > 0
+
+# Example aggregating two projects, with separate keyed groups
+plugin: cloudscale_ch.cloud.inventory
+projects:
+  - api_token: "{{ lookup('env', 'CLOUDSCALE_API_TOKEN_PROD') }}"
+    group_prefix: prod
+  - api_token: "{{ lookup('env', 'CLOUDSCALE_API_TOKEN_STAGING') }}"
+    group_prefix: staging
+keyed_groups:
+  - prefix: os
+    key: cloudscale.image.operating_system | lower
+
+# Example caching the server list for an hour
+plugin: cloudscale_ch.cloud.inventory
+cache: true
+cache_plugin: ansible.builtin.jsonfile
+cache_connection: ~/.cache/ansible/cloudscale
+cache_timeout: 3600
 '''
 import os
 
 from collections import defaultdict
-from json import loads
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
+from hashlib import sha256
 
 from ansible.errors import AnsibleError
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.six.moves.urllib.parse import quote
 from ansible.module_utils.urls import open_url
 from ansible.inventory.group import to_safe_group_name
-from ansible.plugins.inventory import BaseInventoryPlugin, Constructable
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable, Constructable
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils.api import (
+    AnsibleCloudscaleGzipResponse,
+    URLS_DECOMPRESS,
+    iter_json_list,
+)
+
+
+def compile_field_paths(paths):
+    '''
+        :param paths: dotted field paths like 'image.slug'
+        :return a tree of nested dicts of the path components, where True
+                marks a field which is selected as a whole
+    '''
+    tree = {}
+    for path in paths:
+        node = tree
+        parts = [part.replace('[]', '').replace('[*]', '')
+                 for part in path.split('.')]
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+            if node is True:
+                break
+        else:
+            node[parts[-1]] = True
+    return tree
+
+
+def project_fields(value, include=True, exclude=None):
+    '''
+        :param value: the dict or list to project
+        :param include: tree of the fields to keep, True to keep all
+        :param exclude: tree of the fields to remove
+        :return a copy of value with only the selected fields
+    '''
+    if isinstance(value, list):
+        return [project_fields(item, include, exclude) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    result = {}
+    for key, item in value.items():
+        sub_include = True if include is True else include.get(key)
+        sub_exclude = exclude.get(key) if exclude else None
+        if sub_include is None or sub_exclude is True:
+            continue
+        if sub_include is True and not sub_exclude:
+            result[key] = item
+        else:
+            result[key] = project_fields(item, sub_include, sub_exclude)
+    return result
+
 
 iface_type_map = {
     'public_v4': ('public', 4),
@@ -91,29 +310,201 @@ iface_type_map = {
     'none': (None, None),
 }
 
+# Variables set by address_vars, with the addresses they are the first of
+address_var_map = {
+    'cloudscale_public_v4': ('public', 4),
+    'cloudscale_public_v6': ('public', 6),
+    'cloudscale_private_v4': ('private', 4),
+}
+
+
+def index_addresses(server):
+    '''
+        :param server: a server returned by the API
+        :return a dict of the lists of addresses of the server by interface
+                type and IP version, like ('public', 4), and by interface
+                type, like 'private', collected in one pass
+    '''
+    addresses = defaultdict(list)
+    for interface in server.get('interfaces') or []:
+        for address in interface.get('addresses') or []:
+            addresses[interface['type'], address['version']].append(address['address'])
+            addresses[interface['type']].append(address['address'])
+    return addresses
 
-class InventoryModule(BaseInventoryPlugin, Constructable):
+
+class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
 
     NAME = 'cloudscale'
 
     @property
     def api_url(self):
-        return os.environ.get(
-            'CLOUDSCALE_API_URL', 'https://api.cloudscale.ch/v1')
+        return self.get_option('api_url')
 
     @property
     def api_token(self):
         return self.get_option('api_token') \
             or os.environ.get('CLOUDSCALE_API_TOKEN')
 
-    def _get_server_list(self):
+    def _get_projects(self):
+        '''
+            :return the projects to fetch the servers from, either from the
+                    projects option or the single project of api_token
+        '''
+        projects = self.get_option('projects')
+        if not projects:
+            if not self.api_token:
+                raise AnsibleError('Could not find an API token. Set the '
+                                   'CLOUDSCALE_API_TOKEN environment variable.')
+            return [{
+                'api_url': self.api_url,
+                'api_token': self.api_token,
+                'group_prefix': '',
+            }]
+
+        result = []
+        for project in projects:
+            if not isinstance(project, dict) or not project.get('api_token'):
+                raise AnsibleError('Every entry of the option projects '
+                                   'requires an api_token.')
+            result.append({
+                'api_url': project.get('api_url') or self.api_url,
+                'api_token': self.templar.template(project['api_token']),
+                'group_prefix': project.get('group_prefix') or '',
+            })
+        return result
+
+    def _get_list(self, resource, query=None, predicate=None, project=None):
 
-        # Get list of servers from cloudscale.ch API
+        # Get list of resources from cloudscale.ch API
+        project = project or self._get_projects()[0]
+        url = project['api_url'] + '/' + resource
+        if query:
+            url += '?' + '&'.join(query)
+        kwargs = dict(decompress=False) if URLS_DECOMPRESS else dict()
         response = open_url(
-            self.api_url + '/servers',
-            headers={'Authorization': 'Bearer %s' % self.api_token}
+            url,
+            headers={
+                'Authorization': 'Bearer %s' % project['api_token'],
+                'Accept-Encoding': 'gzip',
+            },
+            **kwargs
         )
-        return loads(response.read())
+
+        # Decode gzipped responses while they are parsed
+        if (response.headers.get('Content-Encoding') or '').lower() == 'gzip':
+            response = AnsibleCloudscaleGzipResponse(response, lambda r: self.display.debug(
+                'cloudscale inventory: GET %s: %s bytes gzip compressed, %s bytes uncompressed'
+                % (url, r.compressed, r.uncompressed)))
+        return [item for item in iter_json_list(response)
+                if predicate is None or predicate(item)]
+
+    def _get_server_list(self, project=None):
+        filters = self.get_option('filters') or {}
+        unknown = set(filters) - set(('tags', 'name', 'zone', 'status'))
+        if unknown:
+            raise AnsibleError('Invalid keys in option filters: %s'
+                               % ', '.join(sorted(unknown)))
+
+        # Tags are filtered by the API
+        query = []
+        for key, value in sorted((filters.get('tags') or {}).items()):
+            if value is None or value == '':
+                query.append('tag:%s' % quote(key))
+            else:
+                query.append('tag:%s=%s' % (quote(key), quote(str(value))))
+
+        names = filters.get('name') or []
+        zones = filters.get('zone') or []
+        statuses = filters.get('status') or []
+
+        def predicate(server):
+            if names and not any(fnmatchcase(server['name'], n) for n in names):
+                return False
+            if zones and server['zone']['slug'] not in zones:
+                return False
+            if statuses and server['status'] not in statuses:
+                return False
+            return True
+
+        return self._get_list('servers', query, predicate, project)
+
+    def _get_resource_lists(self, projects, resources):
+        '''
+            :param projects: the projects returned by _get_projects
+            :param resources: the API resources to fetch besides the servers
+            :return a dict with the list of each resource for every project,
+                    fetched concurrently by up to max_workers threads
+        '''
+        requests = len(projects) * (len(resources) + 1)
+        if requests == 1:
+            return [{'servers': self._get_server_list(projects[0])}]
+
+        with ThreadPoolExecutor(max_workers=min(requests, self.get_option('max_workers'))) as executor:
+            futures = []
+            for project in projects:
+                project_futures = {'servers': executor.submit(self._get_server_list, project)}
+                for resource in resources:
+                    project_futures[resource] = executor.submit(
+                        self._get_list, resource, project=project)
+                futures.append(project_futures)
+
+            return [dict((k, v.result()) for k, v in project_futures.items())
+                    for project_futures in futures]
+
+    @staticmethod
+    def _join_resources(resource_lists):
+        '''
+            :param resource_lists: the dict returned by _get_resource_lists
+            :return copies of the servers with the details of the included
+                    resources belonging to them, joined by server UUID
+        '''
+        floating_ips = None
+        if 'floating-ips' in resource_lists:
+            floating_ips = defaultdict(list)
+            for floating_ip in resource_lists['floating-ips']:
+                if floating_ip.get('server'):
+                    floating_ips[floating_ip['server']['uuid']].append(floating_ip)
+
+        # Volumes and server groups are already on the servers as stubs
+        details = {}
+        for resource, key in (('volumes', 'volumes'), ('server-groups', 'server_groups')):
+            if resource in resource_lists:
+                details[key] = dict((r['uuid'], r) for r in resource_lists[resource])
+
+        if floating_ips is None and not details:
+            return resource_lists['servers']
+
+        servers = []
+        for server in resource_lists['servers']:
+            server = dict(server)
+            if floating_ips is not None:
+                server['floating_ips'] = floating_ips[server['uuid']]
+            for key, resources in details.items():
+                server[key] = [dict(resources.get(stub['uuid'], {}), **stub)
+                               for stub in server.get(key) or []]
+            servers.append(server)
+        return servers
+
+    @staticmethod
+    def _prefix_groups(groups, group_prefix):
+        if not group_prefix or not groups:
+            return groups
+        return dict(('%s_%s' % (group_prefix, name), conditional)
+                    for name, conditional in groups.items())
+
+    @staticmethod
+    def _prefix_keyed_groups(keyed_groups, group_prefix):
+        if not group_prefix or not keyed_groups:
+            return keyed_groups
+
+        prefixed = []
+        for keyed in keyed_groups:
+            if isinstance(keyed, dict):
+                prefix = keyed.get('prefix')
+                keyed = dict(keyed, prefix='%s_%s' % (group_prefix, prefix) if prefix else group_prefix)
+            prefixed.append(keyed)
+        return prefixed
 
     def verify_file(self, path):
         '''
@@ -133,9 +524,7 @@ class InventoryModule(BaseInventoryPlugin, Constructable):
 
         self._read_config_data(path)
 
-        if not self.api_token:
-            raise AnsibleError('Could not find an API token. Set the '
-                               'CLOUDSCALE_API_TOKEN environment variable.')
+        projects = self._get_projects()
 
         inventory_hostname = self.get_option('inventory_hostname')
         if inventory_hostname not in ('name', 'uuid'):
@@ -147,10 +536,90 @@ class InventoryModule(BaseInventoryPlugin, Constructable):
             raise AnsibleError('Invalid value for option ansible_host: %s'
                                % ansible_host)
 
-        # Merge servers with the same name
+        if self.get_option('max_workers') < 1:
+            raise AnsibleError('Invalid value for option max_workers: %s'
+                               % self.get_option('max_workers'))
+
+        address_vars = self.get_option('address_vars')
+
+        included = [resource for resource, option in (
+            ('floating-ips', 'include_floating_ips'),
+            ('volumes', 'include_volumes'),
+            ('server-groups', 'include_server_groups'),
+        ) if self.get_option(option)]
+
+        # Use the cached resource lists if allowed and available. They are
+        # only valid for the same projects, resources and filters.
+        cache_key = self.get_cache_key(path)
+        cache_meta = {
+            'projects': [[p['api_url'], sha256(to_bytes(p['api_token'])).hexdigest()]
+                         for p in projects],
+            'resources': included,
+            'filters': self.get_option('filters'),
+        }
+        use_cache = self.get_option('cache') and cache
+        update_cache = self.get_option('cache') and not cache
+
+        resource_lists = None
+        if use_cache:
+            try:
+                cached = self._cache[cache_key]
+            except KeyError:
+                update_cache = True
+            else:
+                if isinstance(cached, dict) and cached.get('meta') == cache_meta:
+                    resource_lists = cached['lists']
+                else:
+                    update_cache = True
+
+        if resource_lists is None:
+            resource_lists = self._get_resource_lists(projects, included)
+
+        if update_cache:
+            self._cache[cache_key] = {
+                'meta': cache_meta,
+                'lists': resource_lists,
+            }
+
+        # Merge servers with the same name, across all projects
         firstpass = defaultdict(list)
-        for server in self._get_server_list():
-            firstpass[server['name']].append(server)
+        group_prefixes = {}
+        server_addresses = {}
+        for project, project_lists in zip(projects, resource_lists):
+            for server in self._join_resources(project_lists):
+                firstpass[server['name']].append(server)
+                group_prefixes[server['uuid']] = project['group_prefix']
+                server_addresses[server['uuid']] = index_addresses(server)
+
+        # Compile the fields of the cloudscale variable once
+        hostvar_fields = self.get_option('hostvar_fields') or {}
+        unknown = set(hostvar_fields) - set(('include', 'exclude'))
+        if unknown:
+            raise AnsibleError('Invalid keys in option hostvar_fields: %s'
+                               % ', '.join(sorted(unknown)))
+        include_fields = True
+        if hostvar_fields.get('include'):
+            include_fields = compile_field_paths(hostvar_fields['include'])
+        exclude_fields = compile_field_paths(hostvar_fields.get('exclude') or [])
+
+        # Prefix the group names of each project once
+        prefixed_groups = {}
+        prefixed_keyed_groups = {}
+        for group_prefix in set(p['group_prefix'] for p in projects):
+            prefixed_groups[group_prefix] = self._prefix_groups(
+                self.get_option('groups'), group_prefix)
+            prefixed_keyed_groups[group_prefix] = self._prefix_keyed_groups(
+                self.get_option('keyed_groups'), group_prefix)
+
+        # The host variables only need to be fetched again for each group
+        # expression, if one uses group_names, as the groups of the host change
+        strict = self.get_option('strict')
+        compose = self.get_option('compose')
+        expressions = list((compose or {}).values()) if isinstance(compose, dict) else []
+        expressions.extend((self.get_option('groups') or {}).values())
+        expressions.extend(keyed.get('key') for keyed in self.get_option('keyed_groups') or []
+                           if isinstance(keyed, dict))
+        fetch_hostvars = any(isinstance(e, str) and 'group_names' in e for e in expressions)
 
         # Add servers to inventory
         for name, servers in firstpass.items():
@@ -168,49 +637,57 @@ class InventoryModule(BaseInventoryPlugin, Constructable):
                     server['inventory_hostname'] = server['uuid']
 
             # Set variables
-            iface_type, iface_version = iface_type_map[ansible_host]
             for server in servers:
                 hostname = server.pop('inventory_hostname')
-                if ansible_host != 'none':
-                    addresses = [address['address']
-                                 for interface in server['interfaces']
-                                 for address in interface['addresses']
-                                 if interface['type'] == iface_type
-                                 and address['version'] == iface_version]
-
-                    if len(addresses) > 0:
-                        self.inventory.set_variable(
-                            hostname,
-                            'ansible_host',
-                            addresses[0],
-                        )
+                addresses = server_addresses[server['uuid']]
+                if ansible_host != 'none' and addresses[iface_type_map[ansible_host]]:
+                    self.inventory.set_variable(
+                        hostname,
+                        'ansible_host',
+                        addresses[iface_type_map[ansible_host]][0],
+                    )
+                if address_vars:
+                    for varname, kind in address_var_map.items():
+                        if addresses[kind]:
+                            self.inventory.set_variable(hostname, varname, addresses[kind][0])
+                    self.inventory.set_variable(hostname, 'cloudscale_public_ips', list(addresses['public']))
+                    self.inventory.set_variable(hostname, 'cloudscale_private_ips', list(addresses['private']))
+                group_prefix = group_prefixes[server['uuid']]
+                if include_fields is not True or exclude_fields:
+                    server = project_fields(server, include_fields, exclude_fields)
                 self.inventory.set_variable(
                     hostname,
                     'cloudscale',
                     server,
                 )
 
-                variables = self.inventory.hosts[hostname].get_vars()
+                host = self.inventory.hosts[hostname]
+                variables = host.get_vars()
+
                 # Set composed variables
-                self._set_composite_vars(
-                    self.get_option('compose'),
-                    variables,
-                    hostname,
-                    self.get_option('strict'),
-                )
+                if compose:
+                    self._set_composite_vars(
+                        compose,
+                        variables,
+                        hostname,
+                        strict,
+                    )
+                    variables = host.get_vars()
 
                 # Add host to composed groups
                 self._add_host_to_composed_groups(
-                    self.get_option('groups'),
+                    prefixed_groups[group_prefix],
                     variables,
                     hostname,
-                    self.get_option('strict'),
+                    strict,
+                    fetch_hostvars=fetch_hostvars,
                 )
 
                 # Add host to keyed groups
                 self._add_host_to_keyed_groups(
-                    self.get_option('keyed_groups'),
+                    prefixed_keyed_groups[group_prefix],
                     variables,
                     hostname,
-                    self.get_option('strict'),
+                    strict,
+                    fetch_hostvars=fetch_hostvars,
                 )
@@ -6,18 +6,86 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+import codecs
+import errno
+import inspect
+import io
+import json
 import re
+import socket
+import ssl
+import threading
+import zlib
 
-from datetime import datetime, timedelta
-from time import sleep
 from copy import deepcopy
+from email.utils import parsedate_tz, mktime_tz
+from random import uniform
+from time import sleep, time
 from ansible.module_utils.basic import env_fallback
-from ansible.module_utils.urls import fetch_url
-from ansible.module_utils._text import to_text
+from ansible.module_utils.connection import Connection, ConnectionError
+from ansible.module_utils.urls import fetch_url, open_url
+from ansible.module_utils._text import to_bytes, to_native, to_text
+from ansible.module_utils.six.moves import http_client
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+from .cache import AnsibleCloudscaleFileCache, cloudscale_cache_key
+from .ratelimit import AnsibleCloudscaleRateLimiter
+
+try:
+    from time import monotonic
+except ImportError:
+    # Python 2, elapsed times follow changes of the system clock there
+    from time import time as monotonic
 
 
 VALID_TOKEN = re.compile(r'^[a-zA-Z0-9-._]+\Z')
 
+# Number of bytes read at once from streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Errors of a request over a keep-alive connection closed by the server while
+# idle: RemoteDisconnected of Python 3, the BadStatusLine Python 2 raises
+# instead, and socket errors of resets and broken pipes
+POOL_DISCONNECTED_ERROR = getattr(http_client, 'RemoteDisconnected', http_client.BadStatusLine)
+POOL_DISCONNECTED_ERRNOS = (errno.ECONNRESET, errno.EPIPE)
+
+# Maximum number of unread bytes of a pooled response drained to reuse its
+# connection, the connection is closed instead if more are left
+POOL_DRAIN_SIZE = 64 * 1024
+
+# Whether fetch_url and open_url decode gzip responses themselves (ansible-core
+# 2.14 and later), which is turned off to decode them while they are read.
+# inspect.signature is missing on Python 2, which has only getargspec.
+try:
+    URLS_DECOMPRESS = 'decompress' in inspect.getfullargspec(open_url).args
+except AttributeError:
+    URLS_DECOMPRESS = 'decompress' in inspect.getargspec(open_url).args
+
+# Defaults of the backoff between polls while waiting for a state change
+WAIT_POLL_INTERVAL = 0.5
+WAIT_MAX_INTERVAL = 10.0
+WAIT_BACKOFF = 1.5
+WAIT_JITTER = 0.1
+
+# Responses of requests which are retried: Throttled requests were not
+# processed and are retried for all methods, transient gateway errors for
+# idempotent methods only
+RETRY_STATUS_THROTTLED = 429
+RETRY_STATUS_TRANSIENT = (-1, 502, 503, 504)
+RETRY_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+# Backoff between retries, if the API does not send a Retry-After header
+RETRY_INTERVAL = 1.0
+RETRY_BACKOFF = 2.0
+
+# Seconds to keep GET responses in the file cache for revalidation
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+
+# Ways to look up a resource by name:
+# tag: Let the API filter the list by the tag holding the name
+# scan: Stream the whole list and stop reading as soon as the result is clear
+# list: Fetch the whole list at once using _get
+QUERY_STRATEGIES = ('tag', 'scan', 'list')
+
 
 def cloudscale_argument_spec():
     return dict(
@@ -30,38 +98,903 @@ def cloudscale_argument_spec():
             type='str',
             fallback=(env_fallback, ['CLOUDSCALE_API_TOKEN']),
             no_log=True,
-            required=True,
         ),
         api_timeout=dict(
             type='int',
             fallback=(env_fallback, ['CLOUDSCALE_API_TIMEOUT']),
             default=45,
         ),
+        api_keep_alive=dict(
+            type='bool',
+            fallback=(env_fallback, ['CLOUDSCALE_API_KEEP_ALIVE']),
+            default=False,
+        ),
+        api_response_cache=dict(
+            type='bool',
+            fallback=(env_fallback, ['CLOUDSCALE_API_RESPONSE_CACHE']),
+            default=False,
+        ),
+        api_retries=dict(
+            type='int',
+            fallback=(env_fallback, ['CLOUDSCALE_API_RETRIES']),
+            default=3,
+        ),
+        api_rate_limit=dict(
+            type='float',
+            fallback=(env_fallback, ['CLOUDSCALE_API_RATE_LIMIT']),
+        ),
+        api_stats=dict(
+            type='bool',
+            fallback=(env_fallback, ['CLOUDSCALE_API_STATS']),
+            default=False,
+        ),
     )
 
 
+def cloudscale_wait_argument_spec():
+    return dict(
+        wait=dict(type='bool', default=True),
+        wait_timeout=dict(type='int'),
+        poll_interval=dict(type='float', default=WAIT_POLL_INTERVAL),
+        poll_max_interval=dict(type='float', default=WAIT_MAX_INTERVAL),
+    )
+
+
+def wait_for(poll, done, timeout, interval=WAIT_POLL_INTERVAL, max_interval=WAIT_MAX_INTERVAL,
+             backoff=WAIT_BACKOFF, jitter=WAIT_JITTER):
+    """ Calls poll until done accepts its result or the timeout in seconds
+    passed. The interval between the calls grows exponentially by the backoff
+    factor up to max_interval and is randomized by the jitter fraction.
+
+    Returns the last result of poll, whether it was accepted by done and the
+    number of calls to poll.
+
+    """
+    deadline = monotonic() + timeout
+    polls = 0
+    while True:
+        result = poll()
+        polls += 1
+        if done(result):
+            return result, True, polls
+
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return result, False, polls
+
+        sleep(min(interval * uniform(1 - jitter, 1 + jitter), remaining))
+        interval = min(interval * backoff, max_interval)
+
+
+class AnsibleCloudscaleConnectionPool(object):
+    """ Keeps the HTTP connections to the API open between requests, so that
+    the TCP and TLS handshakes are only paid once per API host and module run.
+
+    """
+
+    def __init__(self, timeout):
+        self._timeout = timeout
+        self._idle = {}
+        self._lock = threading.Lock()
+        self.stats = {
+            'opened': 0,
+            'reused': 0,
+        }
+
+    def _acquire(self, scheme, netloc):
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                self.stats['reused'] += 1
+                return idle.pop(), True
+            self.stats['opened'] += 1
+
+        if scheme == 'https':
+            connection = http_client.HTTPSConnection(
+                netloc,
+                timeout=self._timeout,
+                context=ssl.create_default_context(),
+            )
+        else:
+            connection = http_client.HTTPConnection(netloc, timeout=self._timeout)
+        return connection, False
+
+    def _release(self, scheme, netloc, connection, response):
+        if response.will_close:
+            connection.close()
+            return
+
+        with self._lock:
+            self._idle.setdefault((scheme, netloc), []).append(connection)
+
+    def request(self, method, url, headers=None, data=None, stream=False):
+        """ Sends a request over a pooled connection and returns the response
+        with either its body or, if stream is set, a file-like object to read
+        the body from.
+
+        """
+        parsed = urlparse(url)
+        path = parsed.path
+        if parsed.query:
+            path += '?' + parsed.query
+        if data is not None:
+            data = to_bytes(data, errors='surrogate_or_strict')
+
+        while True:
+            connection, reused = self._acquire(parsed.scheme, parsed.netloc)
+            try:
+                connection.request(method, path, body=data, headers=headers or {})
+                response = connection.getresponse()
+                body = None if stream else response.read()
+            except (http_client.BadStatusLine, socket.error) as e:
+                connection.close()
+                # The server closed an idle keep-alive connection before our
+                # request reached it, retry once on a fresh connection.
+                disconnected = isinstance(e, POOL_DISCONNECTED_ERROR) or getattr(e, 'errno', None) in POOL_DISCONNECTED_ERRNOS
+                if reused and disconnected:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+            if stream:
+                return response, AnsibleCloudscalePooledResponse(
+                    self, parsed.scheme, parsed.netloc, connection, response)
+
+            self._release(parsed.scheme, parsed.netloc, connection, response)
+            return response, body
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle.values():
+                for connection in connections:
+                    connection.close()
+            self._idle = {}
+
+
+class AnsibleCloudscalePooledResponse(object):
+    """ File-like response body which hands its connection back to the pool
+    once the body was read.
+
+    """
+
+    def __init__(self, pool, scheme, netloc, connection, response):
+        self._pool = pool
+        self._scheme = scheme
+        self._netloc = netloc
+        self._connection = connection
+        self._response = response
+
+    def _release(self):
+        if self._connection is not None:
+            self._pool._release(self._scheme, self._netloc, self._connection, self._response)
+            self._connection = None
+
+    def read(self, amt=None):
+        data = self._response.read(amt)
+        if not data or self._response.isclosed():
+            self._release()
+        return data
+
+    def close(self):
+        if self._connection is None:
+            return
+
+        # Drain a small unread rest of the body, the connection can't be
+        # reused otherwise. A large rest, like that of a list only scanned up
+        # to a match, is not transferred, the connection is closed instead.
+        length = self._response.length
+        try:
+            if length is None or length <= POOL_DRAIN_SIZE:
+                drained = 0
+                while drained <= POOL_DRAIN_SIZE:
+                    data = self._response.read(STREAM_CHUNK_SIZE)
+                    if not data:
+                        self._release()
+                        return
+                    drained += len(data)
+        except (http_client.HTTPException, socket.error):
+            pass
+        self._connection.close()
+        self._connection = None
+
+
+class AnsibleCloudscaleGzipResponse(object):
+    """ File-like gzip decoding of a response body while it is read, so that
+    the decompressed body is never held in memory at once.
+
+    The compressed and uncompressed bytes read are counted in the attributes
+    of the same name. The callback on_close is called with the response once
+    it is closed.
+
+    """
+
+    def __init__(self, stream, on_close=None):
+        self._stream = stream
+        self._on_close = on_close
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._buffer = b''
+        self._eof = False
+        self.compressed = 0
+        self.uncompressed = 0
+
+    def _decompress(self):
+        # Limit the output of every step, a small chunk might expand a lot
+        data = self._decompressor.unconsumed_tail
+        if not data:
+            data = self._stream.read(STREAM_CHUNK_SIZE)
+            if not data:
+                self._eof = True
+                return self._decompressor.flush()
+            self.compressed += len(data)
+        return self._decompressor.decompress(data, STREAM_CHUNK_SIZE)
+
+    def read(self, amt=None):
+        chunks = [self._buffer]
+        size = len(self._buffer)
+        while not self._eof and (amt is None or size < amt):
+            chunk = self._decompress()
+            chunks.append(chunk)
+            size += len(chunk)
+
+        data = b''.join(chunks)
+        if amt is not None:
+            data, self._buffer = data[:amt], data[amt:]
+        else:
+            self._buffer = b''
+        self.uncompressed += len(data)
+        return data
+
+    def close(self):
+        if self._stream is None:
+            return
+        self._stream.close()
+        self._stream = None
+        if self._on_close is not None:
+            self._on_close(self)
+
+
+def parse_retry_after(value):
+    """ Returns the seconds to wait of a Retry-After header, given either
+    as seconds or as HTTP date, or None if there is no valid header.
+
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    date = parsedate_tz(value)
+    if date is None:
+        return None
+    return max(mktime_tz(date) - time(), 0.0)
+
+
+def is_gzip_response(info):
+    """ Whether the response of the fetch_url compatible info is gzipped. """
+    return (info.get('content-encoding') or '').strip().lower() == 'gzip'
+
+
+def iter_json_list(stream, stats=None, chunk_size=STREAM_CHUNK_SIZE):
+    """ Parses a JSON list from a file-like object and yields its items one
+    by one, without reading the whole document into memory first.
+
+    The number of bytes read and items parsed is counted in the 'bytes' and
+    'resources' keys of the stats dict, if given.
+
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buf = ''
+    pos = 0
+    eof = False
+    started = False
+
+    try:
+        while True:
+            # Skip whitespace and item separators
+            while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ',')):
+                pos += 1
+
+            if pos < len(buf):
+                if not started:
+                    if buf[pos] != '[':
+                        raise ValueError('Expected a JSON list')
+                    started = True
+                    pos += 1
+                    continue
+
+                if buf[pos] == ']':
+                    return
+
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    # The item is incomplete, unless there is nothing left to read
+                    if eof:
+                        raise
+                else:
+                    # A number at the end of the buffer might continue in the next chunk
+                    if end < len(buf) or eof:
+                        pos = end
+                        if stats is not None:
+                            stats['resources'] = stats.get('resources', 0) + 1
+                        yield item
+                        continue
+
+            elif eof:
+                raise ValueError('Unexpected end of JSON list')
+
+            chunk = stream.read(chunk_size)
+            if stats is not None:
+                stats['bytes'] = stats.get('bytes', 0) + len(chunk)
+            eof = not chunk
+            buf = buf[pos:] + text_decoder.decode(chunk, final=eof)
+            pos = 0
+    finally:
+        stream.close()
+
+
+class AnsibleCloudscalePrefixedStream(object):
+    """ File-like object returning the bytes already read from a stream
+    before the rest of the stream.
+
+    """
+
+    def __init__(self, prefix, stream):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, amt=None):
+        if not self._prefix:
+            return self._stream.read(amt)
+
+        if amt is None:
+            data = self._prefix + self._stream.read()
+            self._prefix = b''
+        else:
+            data, self._prefix = self._prefix[:amt], self._prefix[amt:]
+        return data
+
+    def close(self):
+        self._stream.close()
+
+
+def load_json(stream, stats=None, chunk_size=STREAM_CHUNK_SIZE):
+    """ Parses a JSON document from a file-like object and closes it. Lists
+    are parsed item by item using iter_json_list, so that only the parsed
+    items are held in memory but never the whole document.
+
+    """
+    prefix = b''
+    try:
+        while not prefix.strip():
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            prefix += chunk
+    except Exception:
+        stream.close()
+        raise
+
+    stream = AnsibleCloudscalePrefixedStream(prefix, stream)
+    if prefix.lstrip()[:1] == b'[':
+        return list(iter_json_list(stream, stats, chunk_size))
+
+    try:
+        data = stream.read()
+    finally:
+        stream.close()
+    if stats is not None:
+        stats['bytes'] = stats.get('bytes', 0) + len(data)
+    return json.loads(to_text(data, errors='surrogate_or_strict'))
+
+
+class AnsibleCloudscaleApiStats(object):
+    """ Records every request sent to the API with its method, path, status,
+    bytes read and wall time, as well as the time spent before sending
+    requests due to the rate limit and retries.
+
+    """
+
+    def __init__(self, api_url):
+        self._api_url = api_url
+        self._lock = threading.Lock()
+        self._start = monotonic()
+        self.requests = []
+        self.retries = 0
+        self.retry_seconds = 0.0
+        self.rate_limit_seconds = 0.0
+
+    def add_request(self, method, url, status, seconds, size=0):
+        """ Records a request and returns its entry, to add the bytes and
+        time of reading a streamed body to.
+
+        """
+        path = url[len(self._api_url):] if url.startswith(self._api_url) else url
+        entry = {
+            'method': method,
+            'path': path,
+            'status': status,
+            'bytes': size,
+            'time': seconds,
+        }
+        with self._lock:
+            self.requests.append(entry)
+        return entry
+
+    def add_retry(self, seconds):
+        with self._lock:
+            self.retries += 1
+            self.retry_seconds += seconds
+
+    def add_rate_limit(self, seconds):
+        with self._lock:
+            self.rate_limit_seconds += seconds
+
+    def get_summary(self):
+        requests = [dict(r, time=round(r['time'], 3)) for r in self.requests]
+        return {
+            'requests': requests,
+            'request_count': len(requests),
+            'request_time': round(sum(r['time'] for r in self.requests), 3),
+            'bytes': sum(r['bytes'] for r in self.requests),
+            'retries': self.retries,
+            'retry_time': round(self.retry_seconds, 3),
+            'rate_limit_time': round(self.rate_limit_seconds, 3),
+            'total_time': round(monotonic() - self._start, 3),
+        }
+
+
+class AnsibleCloudscaleStatsResponse(object):
+    """ File-like response body adding the bytes read and the time spent
+    reading them to the entry of its request.
+
+    """
+
+    def __init__(self, stream, entry):
+        self._stream = stream
+        self._entry = entry
+
+    def read(self, amt=None):
+        start = monotonic()
+        data = self._stream.read(amt)
+        self._entry['bytes'] += len(data)
+        self._entry['time'] += monotonic() - start
+        return data
+
+    def close(self):
+        self._stream.close()
+
+
 class AnsibleCloudscaleApi(object):
 
-    def __init__(self, module):
+    # Attributes of the client talking to the API, shared with the instances
+    # created with client set to this one
+    CLIENT_ATTRIBUTES = (
+        '_api_url',
+        '_api_token',
+        '_auth_header',
+        '_connection',
+        '_connection_pool',
+        '_responses',
+        '_response_file_cache',
+        '_rate_limiter',
+        '_api_stats',
+    )
+
+    def __init__(self, module, client=None):
         self._module = module
 
+        # Counted per instance, also if the client is shared
+        self._connections_opened = 0
+        self._responses_revalidated = 0
+
+        # Number of polls and seconds spent waiting for state changes
+        self._wait_stats = {
+            'polls': 0,
+            'seconds': 0.0,
+        }
+
+        # Send the requests through the client of another instance, sharing
+        # its connections, response cache, rate limit and request stats
+        if client is not None:
+            for name in self.CLIENT_ATTRIBUTES:
+                setattr(self, name, getattr(client, name))
+            return
+
         self._api_url = module.params['api_url']
         if not self._api_url.endswith('/'):
             self._api_url = self._api_url + '/'
 
-        api_token = module.params['api_token'].strip()
-        if not VALID_TOKEN.match(api_token):
+        # Requests go through the persistent connection of the httpapi plugin, if used
+        self._connection = None
+        if getattr(module, '_socket_path', None):
+            self._connection = Connection(module._socket_path)
+
+        api_token = (module.params['api_token'] or '').strip()
+        if not api_token and self._connection is not None:
+            # The httpapi plugin authenticates the requests
+            self._auth_header = {}
+        elif not api_token:
+            self._module.fail_json(msg='missing required arguments: api_token')
+        elif not VALID_TOKEN.match(api_token):
             self._module.fail_json(msg='Invalid API Token')
         else:
             self._auth_header = {'Authorization': 'Bearer %s' % api_token}
 
+        # Params of cloudscale_wait_argument_spec, time.sleep fails on negative intervals
+        for param in ('wait_timeout', 'poll_interval', 'poll_max_interval'):
+            if module.params.get(param) is not None and module.params[param] <= 0:
+                self._module.fail_json(msg='%s must be greater than 0, got %s.' % (param, module.params[param]))
+
+        # Opt-in connection reuse, every request opens a new connection otherwise
+        self._connection_pool = None
+        if module.params.get('api_keep_alive'):
+            self._connection_pool = AnsibleCloudscaleConnectionPool(
+                timeout=module.params['api_timeout'],
+            )
+
+        # GET responses with validators (ETag, Last-Modified) by URL, to
+        # revalidate them with conditional requests
+        self._responses = dict()
+        self._response_file_cache = None
+        if module.params.get('api_response_cache') and api_token:
+            self._response_file_cache = AnsibleCloudscaleFileCache('responses', RESPONSE_CACHE_TTL)
+        self._api_token = api_token
+
+        # Requests per second shared by all tasks of the account on this host
+        self._rate_limiter = None
+        if module.params.get('api_rate_limit'):
+            self._rate_limiter = AnsibleCloudscaleRateLimiter(
+                module.params['api_rate_limit'],
+                cloudscale_cache_key(self._api_url, api_token),
+            )
+
+        # Timings of the requests, returned as api_stats if enabled
+        self._api_stats = None
+        if module.params.get('api_stats'):
+            self._api_stats = AnsibleCloudscaleApiStats(self._api_url)
+
+    @property
+    def connection_stats(self):
+        """ Number of connections opened and reused to talk to the API. """
+        if self._connection_pool is not None:
+            return dict(self._connection_pool.stats)
+        return {
+            'opened': self._connections_opened,
+            'reused': 0,
+        }
+
+    def _request(self, url, method='GET', headers=None, data=None, stream=False):
+        """ Sends a request to the API and returns the response body and a
+        fetch_url compatible info dict.
+
+        If stream is set, a file-like object to read the body from is
+        returned instead of the body. It must be closed after use.
+
+        Requests are held back by the rate limit, if set, and retried if
+        throttled or failing transiently, the number of retries is added to
+        the info.
+
+        """
+        retries = 0
+        while True:
+            if self._rate_limiter is not None:
+                waited = self._rate_limiter.acquire()
+                if self._api_stats is not None:
+                    self._api_stats.add_rate_limit(waited)
+
+            start = monotonic()
+            resp, info = self._send_request(url, method, headers, data, stream)
+            if self._api_stats is not None:
+                resp = self._add_request_stats(url, method, resp, info, stream, monotonic() - start)
+
+            delay = self._get_retry_delay(method, info, retries)
+            if delay is None:
+                info['retries'] = retries
+                return resp, info
+
+            retries += 1
+            self._module.debug('%s %s: %s, retry %s of %s in %.1f seconds' % (
+                method, url, info.get('msg', info['status']), retries, self._module.params.get('api_retries'), delay))
+            if info['status'] == RETRY_STATUS_THROTTLED and self._rate_limiter is not None:
+                # Let all other tasks wait for the throttling to end as well
+                self._rate_limiter.pause(delay)
+            if self._api_stats is not None:
+                self._api_stats.add_retry(delay)
+            sleep(delay)
+
+    def _add_request_stats(self, url, method, resp, info, stream, seconds):
+        """ Records the request in the API stats. Returns the response,
+        wrapped to count the bytes read, if streamed.
+
+        """
+        if resp is None:
+            body = info.get('body') or b''
+        elif stream:
+            entry = self._api_stats.add_request(method, url, info['status'], seconds)
+            return AnsibleCloudscaleStatsResponse(resp, entry)
+        else:
+            body = resp
+        self._api_stats.add_request(method, url, info['status'], seconds, len(body))
+        return resp
+
+    def _get_retry_delay(self, method, info, retries):
+        """ Returns the seconds to wait before retrying a request with the
+        response info, or None if it is not to be retried.
+
+        """
+        status = info['status']
+        if status != RETRY_STATUS_THROTTLED and not (status in RETRY_STATUS_TRANSIENT and method in RETRY_METHODS):
+            return None
+
+        if retries >= (self._module.params.get('api_retries') or 0):
+            return None
+
+        retry_after = parse_retry_after(info.get('retry-after'))
+        if retry_after is None:
+            return min(RETRY_INTERVAL * RETRY_BACKOFF ** retries, WAIT_MAX_INTERVAL) * uniform(1, 1 + WAIT_JITTER)
+
+        # Rather fail than block the task for longer than a request may take
+        if retry_after > self._module.params['api_timeout']:
+            return None
+        return retry_after
+
+    def _send_request(self, url, method, headers, data, stream):
+        """ Sends a single request, see _request. Responses are requested
+        gzipped and decoded while they are read.
+
+        """
+        if self._connection is not None:
+            return self._request_httpapi(url, method, headers, data, stream)
+
+        headers = dict(headers or {})
+        headers['Accept-Encoding'] = 'gzip'
+
+        if self._connection_pool is None:
+            self._connections_opened += 1
+            kwargs = dict(decompress=False) if URLS_DECOMPRESS else dict()
+            resp, info = fetch_url(self._module,
+                                   url,
+                                   headers=headers,
+                                   method=method,
+                                   data=data,
+                                   timeout=self._module.params['api_timeout'],
+                                   **kwargs)
+            # On HTTP errors, resp is the HTTPError, its body is read into info
+            if resp is None or info['status'] >= 400:
+                if info.get('body') and is_gzip_response(info):
+                    info['body'] = self._decompress_body(method, url, info['body'])
+                if resp is not None:
+                    resp.close()
+                return None, info
+        else:
+            info = {'url': url}
+            try:
+                resp, resp_stream = self._connection_pool.request(method, url, headers=headers, data=data, stream=True)
+            except (http_client.HTTPException, socket.error) as e:
+                info.update(msg='Connection failure: %s' % to_native(e), status=-1)
+                return None, info
+
+            info.update((k.lower(), v) for k, v in resp.getheaders())
+            info['status'] = resp.status
+            if resp.status >= 400:
+                body = self._read_body(method, url, resp_stream, info)
+                info.update(msg='HTTP Error %s: %s' % (resp.status, resp.reason), body=body)
+                return None, info
+
+            info['msg'] = 'OK (%s bytes)' % resp.getheader('Content-Length', 'unknown')
+            resp = resp_stream
+
+        if stream:
+            if is_gzip_response(info):
+                resp = AnsibleCloudscaleGzipResponse(resp, lambda r: self._debug_gzip_response(method, url, r))
+            return resp, info
+
+        body = self._read_body(method, url, resp, info)
+        if info['status'] != -1:
+            info['msg'] = 'OK (%s bytes)' % len(body)
+        return body, info
+
+    def _read_body(self, method, url, resp, info):
+        """ Reads and decodes the whole body of a response. Read errors are
+        reported in info like connection failures.
+
+        """
+        if is_gzip_response(info):
+            resp = AnsibleCloudscaleGzipResponse(resp, lambda r: self._debug_gzip_response(method, url, r))
+        try:
+            return resp.read()
+        except (http_client.HTTPException, socket.error, zlib.error) as e:
+            info.update(msg='Connection failure: %s' % to_native(e), status=-1)
+            return b''
+        finally:
+            resp.close()
+
+    def _decompress_body(self, method, url, body):
+        """ Decodes the gzipped body of an error response read by fetch_url. """
+        try:
+            resp = AnsibleCloudscaleGzipResponse(io.BytesIO(body), lambda r: self._debug_gzip_response(method, url, r))
+            try:
+                return resp.read()
+            finally:
+                resp.close()
+        except zlib.error:
+            return body
+
+    def _debug_gzip_response(self, method, url, resp):
+        self._module.debug('%s %s: %s bytes gzip compressed, %s bytes uncompressed' % (
+            method, url, resp.compressed, resp.uncompressed))
+
+    def _request_httpapi(self, url, method, headers, data, stream):
+        """ Like _request, but sends the request through the httpapi plugin. """
+        parsed = urlparse(url)
+        path = parsed.path
+        if parsed.query:
+            path += '?' + parsed.query
+
+        info = {'url': url}
+        try:
+            response = self._connection.send_request(to_text(data) if data is not None else None,
+                                                     method=method, path=path, headers=headers)
+        except ConnectionError as e:
+            info.update(msg='Connection failure: %s' % to_native(e), status=-1)
+            return None, info
+
+        info.update(response['headers'])
+        info['status'] = response['status']
+        body = to_bytes(response['body'], errors='surrogate_or_strict')
+        if response['status'] >= 400:
+            info.update(msg='HTTP Error %s' % response['status'], body=body)
+            return None, info
+
+        info['msg'] = 'OK (%s bytes)' % len(body)
+        if stream:
+            return io.BytesIO(body), info
+        return body, info
+
+    def _wait(self, poll, done):
+        """ Polls until done accepts the result of poll, honoring the
+        wait_timeout, poll_interval and poll_max_interval params. Returns the
+        last result of poll
+        and whether it was accepted.
+
+        """
+        timeout = self._module.params.get('wait_timeout')
+        if timeout is None:
+            timeout = self._module.params['api_timeout'] * 2
+
+        start = monotonic()
+        result, success, polls = wait_for(
+            poll,
+            done,
+            timeout,
+            interval=self._module.params.get('poll_interval') or WAIT_POLL_INTERVAL,
+            max_interval=self._module.params.get('poll_max_interval') or WAIT_MAX_INTERVAL,
+        )
+        self._wait_stats['polls'] += polls
+        self._wait_stats['seconds'] += monotonic() - start
+        return result, success
+
+    def get_wait_result(self):
+        """ Returns the wait statistics to add to the module result, if the
+        module waited at all.
+
+        """
+        if not self._wait_stats['polls']:
+            return dict()
+
+        return {
+            'wait_polls': self._wait_stats['polls'],
+            'wait_time': round(self._wait_stats['seconds'], 3),
+        }
+
+    def get_api_stats_result(self):
+        """ Returns the timings of the requests and waits to add to the
+        module result as api_stats, if enabled.
+
+        """
+        if self._api_stats is None:
+            return dict()
+
+        api_stats = self._api_stats.get_summary()
+        api_stats.update({
+            'connections': self.connection_stats,
+            'wait_polls': self._wait_stats['polls'],
+            'wait_time': round(self._wait_stats['seconds'], 3),
+        })
+        return {
+            'api_stats': api_stats,
+        }
+
+    def _get_cached_response(self, url):
+        """ Returns the cached response of the URL and the headers to
+        revalidate it, or None and the headers of a plain request.
+
+        """
+        headers = self._auth_header.copy()
+
+        response = self._responses.get(url)
+        if response is None and self._response_file_cache is not None:
+            response = self._response_file_cache.get(cloudscale_cache_key(url, self._api_token))
+        if response is None:
+            return None, headers
+
+        if response.get('etag'):
+            headers['If-None-Match'] = response['etag']
+        if response.get('last-modified'):
+            headers['If-Modified-Since'] = response['last-modified']
+        return response, headers
+
+    def _set_cached_response(self, url, info, value, copy=True):
+        """ Caches a copy of the value of a GET response, if it can be
+        revalidated. The value is cached as is, if copy is False.
+
+        """
+        response = dict((k, info[k]) for k in ('etag', 'last-modified') if info.get(k))
+        if not response:
+            return
+
+        response['value'] = deepcopy(value) if copy else value
+        self._responses[url] = response
+        if self._response_file_cache is not None:
+            self._response_file_cache.set(cloudscale_cache_key(url, self._api_token), response)
+
+    def _iter_cached_response(self, url, info, resources):
+        """ Passes the resources on and caches them once all were read. """
+        value = []
+        for resource in resources:
+            # Copied before the caller may change it
+            value.append(deepcopy(resource))
+            yield resource
+        self._set_cached_response(url, info, value, copy=False)
+
     def _get(self, api_call):
-        resp, info = fetch_url(self._module, self._api_url + api_call,
-                               headers=self._auth_header,
-                               timeout=self._module.params['api_timeout'])
+        url = self._api_url + api_call
+        response, headers = self._get_cached_response(url)
+        stream, info = self._request(url, headers=headers, stream=True)
+
+        if info['status'] == 304 and response is not None:
+            if stream is not None:
+                stream.close()
+            self._responses_revalidated += 1
+            self._responses[url] = response
+            return deepcopy(response['value'])
+        elif info['status'] == 200:
+            value = load_json(stream)
+            self._set_cached_response(url, info, value)
+            return value
+        elif info['status'] == 404:
+            return None
+        else:
+            self._module.fail_json(msg='Failure while calling the cloudscale.ch API with GET for '
+                                       '"%s".' % api_call, fetch_url_info=info)
 
-        if info['status'] == 200:
-            return self._module.from_json(to_text(resp.read(), errors='surrogate_or_strict'))
+    def _iter_get(self, api_call, stats=None):
+        """ Like _get, but for list responses. Returns an iterator yielding
+        the resources while the response is parsed, or None if the list does
+        not exist.
+
+        """
+        url = self._api_url + api_call
+        response, headers = self._get_cached_response(url)
+        stream, info = self._request(url, headers=headers, stream=True)
+
+        if info['status'] == 304 and response is not None:
+            if stream is not None:
+                stream.close()
+            self._responses_revalidated += 1
+            self._responses[url] = response
+            return iter(deepcopy(response['value']))
+        elif info['status'] == 200:
+            resources = iter_json_list(stream, stats)
+            if info.get('etag') or info.get('last-modified'):
+                return self._iter_cached_response(url, info, resources)
+            return resources
         elif info['status'] == 404:
             return None
         else:
@@ -87,15 +1020,13 @@ class AnsibleCloudscaleApi(object):
             data = self._module.jsonify(data)
             headers['Content-type'] = 'application/json'
 
-        resp, info = fetch_url(self._module,
-                               api_endpoint,
-                               headers=headers,
-                               method=method,
-                               data=data,
-                               timeout=self._module.params['api_timeout'])
+        body, info = self._request(api_endpoint,
+                                   method=method,
+                                   headers=headers,
+                                   data=data)
 
         if info['status'] in (200, 201):
-            return self._module.from_json(to_text(resp.read(), errors='surrogate_or_strict'))
+            return self._module.from_json(to_text(body, errors='surrogate_or_strict'))
         elif info['status'] == 204:
             return None
         else:
@@ -115,13 +1046,13 @@ class AnsibleCloudscaleApi(object):
         else:
             api_endpoint = api_call
 
-        resp, info = fetch_url(self._module,
-                               api_endpoint,
-                               headers=self._auth_header,
-                               method='DELETE',
-                               timeout=self._module.params['api_timeout'])
+        body, info = self._request(api_endpoint,
+                                   method='DELETE',
+                                   headers=self._auth_header)
 
-        if info['status'] == 204:
+        # A retried DELETE may have been carried out before its response
+        # got lost, the resource is gone either way.
+        if info['status'] == 204 or (info['status'] == 404 and info['retries']):
             return None
         else:
             self._module.fail_json(msg='Failure while calling the cloudscale.ch API with DELETE for '
@@ -138,8 +1069,9 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
         resource_key_name='name',
         resource_create_param_keys=None,
         resource_update_param_keys=None,
+        client=None,
     ):
-        super(AnsibleCloudscaleBase, self).__init__(module)
+        super(AnsibleCloudscaleBase, self).__init__(module, client=client)
         self._result = {
             'changed': False,
             'diff': dict(
@@ -171,6 +1103,13 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
         # Constraint Keys to match when query by name
         self.query_constraint_keys = []
 
+        # How to find the resource by name, one of QUERY_STRATEGIES, defaults
+        # to 'tag' if use_tag_for_name is set and to 'scan' otherwise
+        self.query_strategy = None
+
+        # Bytes and resources scanned by the last query by name
+        self.query_stats = dict()
+
     def pre_transform(self, resource):
         return resource
 
@@ -201,12 +1140,7 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
         # Query by name
         else:
             name = self._module.params[self.resource_key_name]
-
-            # Resource has no name field, we use a defined tag as name
-            if self.use_tag_for_name:
-                resources = self._get('%s?tag:%s=%s' % (self.resource_name, self.resource_name_tag, name))
-            else:
-                resources = self._get('%s' % self.resource_name)
+            resources = self.query_resources(name) or []
 
             matching = []
             for resource in resources:
@@ -227,6 +1161,17 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
                     if resource[self.resource_key_name] == name:
                         matching.append(resource)
 
+                        # No need to look any further, this is going to fail
+                        if len(matching) > 1:
+                            break
+
+            self._module.debug("Queried %s by name using the '%s' strategy, scanned %s resources (%s bytes)" % (
+                self.resource_name,
+                self.query_stats['strategy'],
+                self.query_stats.get('resources', 0),
+                self.query_stats.get('bytes', 'unknown'),
+            ))
+
             # Fail on more than one resource with identical name
             if len(matching) > 1:
                 self._module.fail_json(
@@ -244,6 +1189,37 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
 
         return self.pre_transform(self._resource_data)
 
+    def query_resources(self, name):
+        """ Returns an iterable of the resources which might be named name, or
+        None if the resource collection does not exist.
+
+        """
+        strategy = self.query_strategy
+        if strategy is None:
+            strategy = 'tag' if self.use_tag_for_name else 'scan'
+
+        if strategy not in QUERY_STRATEGIES:
+            self._module.fail_json(msg="Unknown query strategy '%s'." % strategy)
+
+        self.query_stats = {
+            'strategy': strategy,
+            'resources': 0,
+        }
+
+        # Let the API filter by the tag holding the name
+        if strategy == 'tag':
+            return self._iter_get('%s?tag:%s=%s' % (self.resource_name, self.resource_name_tag, name), self.query_stats)
+
+        # Stream the whole list, allows to stop reading once the result is clear
+        elif strategy == 'scan':
+            return self._iter_get(self.resource_name, self.query_stats)
+
+        # Fetch the whole list at once, for resources with a custom _get
+        resources = self._get(self.resource_name)
+        if resources is not None:
+            self.query_stats['resources'] = len(resources)
+        return resources
+
     def create(self, resource, data=None):
         # Fail if UUID/ID was provided but the resource was not found on state=present.
         uuid = self._module.params.get(self.resource_key_uuid)
@@ -274,16 +1250,14 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
         return resource
 
     def wait_for_state(self, check_parameter, allowed_states):
-        start = datetime.now()
-        timeout = self._module.params['api_timeout'] * 2
-        while datetime.now() - start < timedelta(seconds=timeout):
-            info = self.query()
+        def has_allowed_state(info):
             if not allowed_states:
-                if not info.get(check_parameter):
-                    return info
-            elif info.get(check_parameter) in allowed_states:
-                return info
-            sleep(1)
+                return not info.get(check_parameter)
+            return info.get(check_parameter) in allowed_states
+
+        info, success = self._wait(self.query, has_allowed_state)
+        if success:
+            return info
 
         # Timeout reached
         name_uuid = info.get('name') or self._module.params.get('name') or \
@@ -294,15 +1268,58 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
         self._module.fail_json(msg=msg)
 
     def update(self, resource):
-        updated = False
+        patch_data = dict()
         for param in self.resource_update_param_keys:
-            updated = self._param_updated(param, resource) or updated
+            patch_data.update(self._param_changes(param, resource))
+
+        return self.patch_resource(resource, patch_data)
+
+    def patch_resource(self, resource, patch_data, filter_none=True):
+        """ Sends all changed fields in a single PATCH and returns the updated
+        resource. The resource is only queried again if neither the response
+        nor the sent fields are enough to rebuild it.
+
+        """
+        if not patch_data or self._module.check_mode:
+            return resource
+
+        href = resource.get('href')
+        if not href:
+            self._module.fail_json(msg='Unable to update %s, no href found.' % ', '.join(sorted(patch_data)))
 
-        # Refresh if resource was updated in live mode
-        if updated and not self._module.check_mode:
+        response = self._patch(href, patch_data, filter_none)
+
+        if response:
+            resource = self.pre_transform(response)
+            resource['state'] = "present"
+
+        elif all(self.is_rebuildable(k, v, resource) for k, v in patch_data.items()):
+            resource = deepcopy(resource)
+            resource.update(deepcopy(patch_data))
+
+        else:
             resource = self.query()
+
         return resource
 
+    def is_rebuildable(self, key, value, resource):
+        """ Whether the resource field key has the value sent in a PATCH after
+        the update, which is not the case for defaults set by the API or for
+        stubs of related resources.
+
+        """
+        if value is None:
+            return False
+
+        current = resource.get(key)
+        if isinstance(current, dict):
+            return 'href' not in current
+
+        if isinstance(current, list):
+            return not any(isinstance(v, dict) for v in current)
+
+        return True
+
     def present(self):
         resource = self.query()
 
@@ -350,34 +1367,28 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
 
         return is_different
 
-    def _param_updated(self, key, resource):
+    def _param_changes(self, key, resource):
+        """ Returns the field to patch if the param differs from the resource. """
         param = self._module.params.get(key)
         if param is None:
-            return False
+            return dict()
 
         if not resource or key not in resource:
-            return False
+            return dict()
 
-        is_different = self.find_difference(key, resource, param)
+        if not self.find_difference(key, resource, param):
+            return dict()
 
-        if is_different:
-            self._result['changed'] = True
+        self._result['changed'] = True
 
-            patch_data = {
-                key: param
-            }
+        patch_data = {
+            key: param
+        }
 
-            self._result['diff']['before'].update({key: resource[key]})
-            self._result['diff']['after'].update(patch_data)
+        self._result['diff']['before'].update({key: resource[key]})
+        self._result['diff']['after'].update(patch_data)
 
-            if not self._module.check_mode:
-                href = resource.get('href')
-                if not href:
-                    self._module.fail_json(msg='Unable to update %s, no href found.' % key)
-
-                self._patch(href, patch_data)
-                return True
-        return False
+        return patch_data
 
     def get_result(self, resource):
         if resource:
@@ -388,4 +1399,13 @@ class AnsibleCloudscaleBase(AnsibleCloudscaleApi):
             if self.use_tag_for_name:
                 self._result['name'] = self._result.get('tags', dict()).pop(self.resource_name_tag, None)
 
+        self._result.update(self.get_wait_result())
+        self._result.update(self.get_api_stats_result())
         return self._result
+
+    def get_api_stats_result(self):
+        result = super(AnsibleCloudscaleBase, self).get_api_stats_result()
+        if result and self.query_stats:
+            # How the resource was looked up by name
+            result['api_stats']['query'] = dict(self.query_stats)
+        return result
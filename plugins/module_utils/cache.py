@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026, René Moser <mail@renemoser.net>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from ansible.module_utils._text import to_bytes
+
+
+def cloudscale_cache_dir():
+    """ Directory of the caches shared between module runs on a host. """
+    return os.environ.get('CLOUDSCALE_CACHE_DIR') or os.path.expanduser('~/.ansible/cache/cloudscale_ch')
+
+
+def cloudscale_cache_key(api_url, api_token):
+    """ Identifies the account of the API token without revealing it. """
+    return hashlib.sha256(to_bytes('%s\n%s' % (api_url, api_token))).hexdigest()
+
+
+class AnsibleCloudscaleFileCache(object):
+    """ Keeps JSON values in files, so that all tasks of a play running on the
+    same host can share them. Values older than ttl seconds are ignored.
+
+    Errors reading or writing the cache are ignored, the cache is just
+    missed in this case.
+
+    """
+
+    def __init__(self, namespace, ttl, path=None):
+        self._namespace = namespace
+        self._ttl = ttl
+        self._path = path or cloudscale_cache_dir()
+
+    def _get_file(self, key):
+        return os.path.join(self._path, '%s-%s.json' % (self._namespace, key))
+
+    def get(self, key):
+        try:
+            with open(self._get_file(key)) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or time.time() - entry.get('timestamp', 0) > self._ttl:
+            return None
+        return entry.get('value')
+
+    def set(self, key, value):
+        entry = {
+            'timestamp': time.time(),
+            'value': value,
+        }
+        try:
+            if not os.path.isdir(self._path):
+                os.makedirs(self._path, 0o700)
+
+            # Replace the file at once, concurrent readers never see a partial write
+            fd, tmp = tempfile.mkstemp(dir=self._path, prefix='.%s-' % self._namespace)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entry, f)
+                os.rename(tmp, self._get_file(key))
+            except Exception:
+                os.unlink(tmp)
+                raise
+        except (IOError, OSError, TypeError, ValueError):
+            pass
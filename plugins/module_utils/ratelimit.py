@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (c) 2026, René Moser <mail@renemoser.net>
+# Simplified BSD License (see licenses/simplified_bsd.txt or https://opensource.org/licenses/BSD-2-Clause)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+from .cache import cloudscale_cache_dir
+
+
+# Bucket states of the processes which can't use a state file, by path
+_local_states = {}
+_local_lock = threading.Lock()
+
+
+class AnsibleCloudscaleRateLimiter(object):
+    """ Token bucket limiting the requests sent to the API to rate per second,
+    allowing bursts of up to burst requests.
+
+    The bucket is kept in a state file locked while it is updated, so that
+    all processes running tasks on the same host, e.g. the forks of a play,
+    share its budget. If the file can't be used, the budget is only shared
+    within the process.
+
+    """
+
+    def __init__(self, rate, key, burst=None, path=None):
+        self._rate = float(rate)
+        self._burst = max(float(burst or rate), 1.0)
+        self._path = os.path.join(path or cloudscale_cache_dir(), 'ratelimit-%s.json' % key)
+
+    @contextmanager
+    def _state(self):
+        """ Yields the bucket state to update while holding its lock. """
+        with _local_lock:
+            try:
+                if not HAS_FCNTL:
+                    raise OSError('fcntl is not available')
+
+                directory = os.path.dirname(self._path)
+                if not os.path.isdir(directory):
+                    os.makedirs(directory, 0o700)
+                fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600)
+            except (IOError, OSError):
+                state = _local_states.setdefault(self._path, dict())
+                yield state
+                return
+
+            with os.fdopen(fd, 'r+') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    state = json.loads(f.read() or '{}')
+                    if not isinstance(state, dict):
+                        state = dict()
+                except ValueError:
+                    state = dict()
+
+                yield state
+
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+
+    def acquire(self):
+        """ Takes a token from the bucket, waiting until one is available.
+        Returns the seconds waited.
+
+        """
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                now = time.time()
+                tokens = state.get('tokens', self._burst)
+                elapsed = max(now - state.get('timestamp', now), 0)
+                tokens = min(tokens + elapsed * self._rate, self._burst)
+
+                delay = state.get('paused_until', 0) - now
+                if delay <= 0:
+                    if tokens >= 1:
+                        tokens -= 1
+                        delay = 0
+                    else:
+                        delay = (1 - tokens) / self._rate
+
+                state['tokens'] = tokens
+                state['timestamp'] = now
+
+            if delay <= 0:
+                return waited
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds):
+        """ Holds back all requests for seconds, e.g. as told by the API in
+        the Retry-After header of a throttled response.
+
+        """
+        with self._state() as state:
+            state['paused_until'] = max(state.get('paused_until', 0), time.time() + seconds)
@@ -0,0 +1,583 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2017, Gaudenz Steinlin <gaudenz.steinlin@cloudscale.ch>
+# Copyright: (c) 2019, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+
+from copy import deepcopy
+
+from ansible.module_utils.basic import env_fallback
+from .api import AnsibleCloudscaleBase, WAIT_POLL_INTERVAL, monotonic
+from .cache import AnsibleCloudscaleFileCache, cloudscale_cache_key
+
+
+def cloudscale_server_argument_spec():
+    return dict(
+        name=dict(),
+        flavor=dict(),
+        image=dict(),
+        zone=dict(),
+        volume_size_gb=dict(type='int', default=10),
+        bulk_volume_size_gb=dict(type='int'),
+        ssh_keys=dict(type='list', elements='str', no_log=False),
+        password=dict(no_log=True),
+        use_public_network=dict(type='bool'),
+        use_private_network=dict(type='bool'),
+        use_ipv6=dict(type='bool', default=True),
+        interfaces=dict(
+            type='list',
+            elements='dict',
+            options=dict(
+                network=dict(type='str'),
+                addresses=dict(
+                    type='list',
+                    elements='dict',
+                    options=dict(
+                        address=dict(type='str'),
+                        subnet=dict(type='str'),
+                    ),
+                ),
+            ),
+        ),
+        server_groups=dict(type='list', elements='str'),
+        user_data=dict(),
+        force=dict(type='bool', default=False),
+        tags=dict(type='dict'),
+    )
+
+
+def cloudscale_server_group_cache_argument_spec():
+    return dict(
+        server_group_cache_ttl=dict(
+            type='int',
+            fallback=(env_fallback, ['CLOUDSCALE_SERVER_GROUP_CACHE_TTL']),
+            default=300,
+        ),
+    )
+
+
+# Params which are not sent to the API when creating a server
+SERVER_MODULE_PARAM_KEYS = ('force', )
+
+# Server groups (UUID and name) by API URL and token, shared by all servers
+# managed in a module run
+_server_groups_cache = dict()
+_server_groups_lock = threading.Lock()
+
+# Server groups of the cache found to still exist by API URL and UUID, looked
+# up once per module run
+_server_groups_verified = set()
+
+
+class AnsibleCloudscaleServerPoll(object):
+    """ Shares the GET of the server list among all servers waited for at
+    the same time, so that waiting costs one request per poll instead of one
+    request per server and poll.
+
+    """
+
+    def __init__(self, max_age=WAIT_POLL_INTERVAL):
+        # Age in seconds up to which the last poll is handed out again
+        self._max_age = max_age
+
+        self._servers = None
+        self._started = None
+        self._polling = False
+        self._condition = threading.Condition()
+
+    def get_servers(self, api, since):
+        """ Returns the servers by UUID, as listed by a poll started after
+        since. Polls the API using api, unless a recent enough poll is
+        available or running in another thread already.
+
+        """
+        not_before = max(since, monotonic() - self._max_age)
+        with self._condition:
+            while self._started is None or self._started < not_before:
+                if not self._polling:
+                    self._polling = True
+                    break
+                self._condition.wait()
+            else:
+                return self._servers
+
+        started = monotonic()
+        servers = None
+        try:
+            servers = dict()
+            for server in api._iter_get('servers') or ():
+                servers[server['uuid']] = AnsibleCloudscaleServer._transform_state(server)
+        finally:
+            with self._condition:
+                self._polling = False
+                if servers is not None:
+                    self._servers = servers
+                    self._started = started
+                self._condition.notify_all()
+        return servers
+
+
+class AnsibleCloudscaleServer(AnsibleCloudscaleBase):
+
+    def __init__(self, module, server_poll=None, client=None):
+        super(AnsibleCloudscaleServer, self).__init__(module, client=client)
+
+        # Initialize server dictionary
+        self._info = {}
+
+        # Poll shared with other servers while waiting, if any
+        self._server_poll = server_poll
+
+        # States not waited for yet with wait=false
+        self._pending_states = None
+
+    def _init_server_container(self):
+        return {
+            'uuid': self._module.params.get('uuid') or self._info.get('uuid'),
+            'name': self._module.params.get('name') or self._info.get('name'),
+            'state': 'absent',
+        }
+
+    def _get_server_info(self, refresh=False):
+        if self._info and not refresh:
+            return self._info
+
+        self._info = self._init_server_container()
+
+        uuid = self._info.get('uuid')
+        if uuid is not None:
+            server_info = self._get('servers/%s' % uuid)
+            if server_info:
+                self._info = self._transform_state(server_info)
+
+        else:
+            name = self._info.get('name')
+            if name is not None:
+                servers = self._iter_get('servers') or []
+                matching_server = []
+                for server in servers:
+                    if server['name'] == name:
+                        matching_server.append(server)
+
+                        # No need to look any further, this is going to fail
+                        if len(matching_server) > 1:
+                            break
+
+                if len(matching_server) == 1:
+                    self._info = self._transform_state(matching_server[0])
+                elif len(matching_server) > 1:
+                    self._module.fail_json(msg="More than one server with name '%s' exists. "
+                                           "Use the 'uuid' parameter to identify the server." % name)
+
+        return self._info
+
+    @staticmethod
+    def _transform_state(server):
+        if 'status' in server:
+            server['state'] = server['status']
+            del server['status']
+        else:
+            server['state'] = 'absent'
+        return server
+
+    def _poll_server_info(self, since):
+        uuid = self._info.get('uuid')
+        if self._server_poll is None or uuid is None:
+            return self._get_server_info(refresh=True)
+
+        servers = self._server_poll.get_servers(self, since)
+        self._info = deepcopy(servers.get(uuid)) or {
+            'uuid': uuid,
+            'name': self._info.get('name'),
+            'state': 'absent',
+        }
+        return self._info
+
+    def _wait_for_state(self, states, force=False):
+        if not force and not self._module.params.get('wait', True):
+            # Only wait once another request depends on the state change
+            self._pending_states = states
+            self._info = deepcopy(self._info)
+            self._info['state'] = 'changing'
+            return self._info
+
+        self._pending_states = None
+        since = monotonic()
+        server_info, success = self._wait(
+            lambda: self._poll_server_info(since),
+            lambda server_info: server_info.get('state') in states,
+        )
+        if success:
+            return server_info
+
+        # Timeout succeeded
+        if server_info.get('name') is not None:
+            msg = "Timeout while waiting for a state change on server %s to states %s. " \
+                  "Current state is %s." % (server_info.get('name'), states, server_info.get('state'))
+        else:
+            name_uuid = self._module.params.get('name') or self._module.params.get('uuid')
+            msg = 'Timeout while waiting to find the server %s' % name_uuid
+
+        self._module.fail_json(msg=msg)
+
+    def _wait_for_pending_state(self, server_info):
+        if self._pending_states is None:
+            return server_info
+
+        return self._wait_for_state(self._pending_states, force=True)
+
+    def _start_stop_server(self, server_info, target_state="running", ignore_diff=False, wait=True):
+        actions = {
+            'stopped': 'stop',
+            'running': 'start',
+        }
+
+        # Already on the way to the target state
+        if self._pending_states == (target_state, ):
+            return server_info
+
+        server_info = self._wait_for_pending_state(server_info)
+
+        server_state = server_info.get('state')
+        if server_state != target_state:
+            self._result['changed'] = True
+
+            if not ignore_diff:
+                self._result['diff']['before'].update({
+                    'state': server_info.get('state'),
+                })
+                self._result['diff']['after'].update({
+                    'state': target_state,
+                })
+            if not self._module.check_mode:
+                self._post('servers/%s/%s' % (server_info['uuid'], actions[target_state]))
+                if wait:
+                    server_info = self._wait_for_state((target_state, ))
+
+        return server_info
+
+    def _param_change(self, param_key, server_info):
+        """ Returns the field to patch if the param differs from the server. """
+        param_value = self._module.params.get(param_key)
+        if param_value is None:
+            return dict()
+
+        server_v = server_info[param_key]
+        if isinstance(server_v, dict) and 'slug' in server_v:
+            server_v = server_v['slug']
+
+        if server_v == param_value:
+            return dict()
+
+        # Set the diff output
+        self._result['diff']['before'].update({param_key: server_v})
+        self._result['diff']['after'].update({param_key: param_value})
+
+        return {
+            param_key: param_value,
+        }
+
+    def _patch_server(self, server_info, patch_data, requires_stop=False):
+        """ Sends all changes in a single PATCH, stopping the server first if
+        any of them requires it. The server is not started again.
+
+        """
+        self._result['changed'] = True
+        if self._module.check_mode:
+            return server_info
+
+        if requires_stop:
+            server_info = self._start_stop_server(server_info, target_state="stopped", ignore_diff=True)
+        server_info = self._wait_for_pending_state(server_info)
+
+        # Response is 204: No Content
+        self._patch('servers/%s' % server_info['uuid'], patch_data)
+
+        # State changes to "changing" after update, waiting for stopped/running
+        return self._wait_for_state(('stopped', 'running'))
+
+    def _get_server_groups(self, refresh=False):
+        """ Returns the server groups of the account and whether they were
+        taken from a cache. Cached in memory for the module run and, if
+        server_group_cache_ttl is set, in a file for the following tasks.
+
+        """
+        api_token = (self._module.params['api_token'] or '').strip()
+        key = cloudscale_cache_key(self._api_url, api_token)
+
+        # Without a token, the account is only known to the httpapi plugin
+        ttl = self._module.params.get('server_group_cache_ttl')
+        file_cache = AnsibleCloudscaleFileCache('server-groups', ttl) if ttl and api_token else None
+
+        with _server_groups_lock:
+            if not refresh:
+                server_groups = _server_groups_cache.get(key)
+                if server_groups is None and file_cache is not None:
+                    server_groups = file_cache.get(key)
+                if server_groups is not None:
+                    _server_groups_cache[key] = server_groups
+                    return server_groups, True
+
+            server_groups = [
+                {
+                    'uuid': server_group['uuid'],
+                    'name': server_group['name'],
+                } for server_group in self._iter_get('server-groups') or ()
+            ]
+            _server_groups_cache[key] = server_groups
+            if file_cache is not None:
+                file_cache.set(key, server_groups)
+        return server_groups, False
+
+    def _get_server_group_ids(self, verify=None):
+        """ Returns the UUIDs of the server groups param. Server groups taken
+        from the cache are looked up again if not all of them are found or if
+        verify returns False for their UUIDs, as they may have been created
+        or deleted since.
+
+        """
+        if not self._module.params['server_groups']:
+            return None
+
+        server_groups, cached = self._get_server_groups()
+        results, server_group_params = self._match_server_groups(server_groups)
+
+        if cached and (server_group_params or (verify is not None and not verify(results))):
+            server_groups, cached = self._get_server_groups(refresh=True)
+            results, server_group_params = self._match_server_groups(server_groups)
+
+        if server_group_params:
+            self._module.fail_json(msg="Server group name or UUID not found: %s" % ', '.join(server_group_params))
+
+        return results
+
+    def _match_server_groups(self, server_groups):
+        """ Returns the UUIDs of the server groups given by name or UUID and
+        the names or UUIDs not found.
+
+        """
+        server_group_params = list(self._module.params['server_groups'])
+
+        matching_group_names = []
+        results = []
+        for server_group in server_groups:
+            if server_group['uuid'] in server_group_params:
+                results.append(server_group['uuid'])
+                server_group_params.remove(server_group['uuid'])
+
+            elif server_group['name'] in server_group_params:
+                results.append(server_group['uuid'])
+                server_group_params.remove(server_group['name'])
+                # Remember the names found
+                matching_group_names.append(server_group['name'])
+
+            # Names are not unique, verify if name already found in previous iterations
+            elif server_group['name'] in matching_group_names:
+                self._module.fail_json(msg="More than one server group with name exists: '%s'. "
+                                       "Use the 'uuid' parameter to identify the server group." % server_group['name'])
+
+        return results, server_group_params
+
+    def _get_create_data(self):
+        self.normalize_interfaces_param()
+
+        data = dict()
+        for key in cloudscale_server_argument_spec():
+            if key not in SERVER_MODULE_PARAM_KEYS:
+                data[key] = deepcopy(self._module.params.get(key))
+        data['server_groups'] = self._get_server_group_ids(verify=self._server_groups_exist)
+        return data
+
+    def _server_groups_exist(self, server_group_ids):
+        for server_group_id in server_group_ids:
+            if (self._api_url, server_group_id) in _server_groups_verified:
+                continue
+            if self._get('server-groups/%s' % server_group_id) is None:
+                return False
+            _server_groups_verified.add((self._api_url, server_group_id))
+        return True
+
+    def _create_server(self, server_info, wait=True):
+        self._result['changed'] = True
+        data = self._get_create_data()
+
+        self._result['diff']['before'] = self._init_server_container()
+        self._result['diff']['after'] = deepcopy(data)
+        if not self._module.check_mode:
+            # Remember the UUID, there is no need to look up the server by name
+            self._info = self._transform_state(self._post('servers', data))
+            server_info = self._info
+            if wait:
+                server_info = self._wait_for_state(('running', ))
+        return server_info
+
+    def _update_server(self, server_info):
+
+        previous_state = server_info.get('state')
+
+        # The API doesn't support to update server groups.
+        # Show a warning to the user if the desired state does not match.
+        current_server_group_ids = [grp['uuid'] for grp in server_info['server_groups']]
+        desired_server_group_ids = self._get_server_group_ids(verify=lambda ids: ids == current_server_group_ids)
+        if desired_server_group_ids is not None:
+            if desired_server_group_ids != current_server_group_ids:
+                self._module.warn("Server groups can not be mutated, server needs redeployment to change groups.")
+
+        # Remove interface properties that were not filled out by the user
+        self.normalize_interfaces_param()
+
+        # Compare the interfaces as specified by the user, with the interfaces
+        # as received by the API. The structures are somewhat different, so
+        # they need to be evaluated in detail
+        wanted = self._module.params.get('interfaces')
+        actual = server_info.get('interfaces')
+
+        try:
+            update_interfaces = not self.has_wanted_interfaces(wanted, actual)
+        except KeyError as e:
+            self._module.fail_json(
+                msg="Error checking 'interfaces', missing key: %s" % e.args[0])
+
+        # Plan all changes first, to apply them with a single PATCH
+        patch_data = dict()
+        if update_interfaces:
+            patch_data.update(self._param_change('interfaces', server_info))
+        patch_data.update(self._param_change('name', server_info))
+        patch_data.update(self._param_change('tags', server_info))
+
+        # Changes that can only be applied to stopped servers
+        stop_patch_data = self._param_change('flavor', server_info)
+        requires_stop = bool(stop_patch_data) and previous_state == "running"
+        if requires_stop and not self._module.params.get('force'):
+            self._module.warn("Some changes won't be applied to running servers. "
+                              "Use force=true to allow the server '%s' to be stopped/started." % server_info['name'])
+            requires_stop = False
+        else:
+            patch_data.update(stop_patch_data)
+
+        if patch_data:
+            server_info = self._patch_server(server_info, patch_data, requires_stop=requires_stop)
+
+        if previous_state == "running":
+            server_info = self._start_stop_server(server_info, target_state="running", ignore_diff=True)
+
+        return server_info
+
+    def present_server(self):
+        server_info = self._get_server_info()
+
+        if server_info.get('state') != "absent":
+
+            # If target state is stopped, stop before an potential update and force would not be required
+            if self._module.params.get('state') == "stopped":
+                server_info = self._start_stop_server(server_info, target_state="stopped")
+
+            server_info = self._update_server(server_info)
+
+            if self._module.params.get('state') == "running":
+                server_info = self._start_stop_server(server_info, target_state="running")
+        else:
+            server_info = self._create_server(server_info)
+            server_info = self._start_stop_server(server_info, target_state=self._module.params.get('state'))
+
+        return server_info
+
+    def absent_server(self, wait=True):
+        server_info = self._get_server_info()
+        if server_info.get('state') != "absent":
+            self._result['changed'] = True
+            self._result['diff']['before'] = deepcopy(server_info)
+            self._result['diff']['after'] = self._init_server_container()
+            if not self._module.check_mode:
+                self._delete('servers/%s' % server_info['uuid'])
+                if wait:
+                    server_info = self._wait_for_state(('absent', ))
+        return server_info
+
+    def has_wanted_interfaces(self, wanted, actual):
+        """ Compares the interfaces as specified by the user, with the
+        interfaces as reported by the server.
+
+        """
+
+        if len(wanted or ()) != len(actual or ()):
+            return False
+
+        def match_interface(spec):
+
+            # First, find the interface that belongs to the spec
+            for interface in actual:
+
+                # If we have a public network, only look for the right type
+                if spec.get('network') == 'public':
+                    if interface['type'] == 'public':
+                        break
+
+                # If we have a private network, check the network's UUID
+                if spec.get('network') is not None:
+                    if interface['type'] == 'private':
+                        if interface['network']['uuid'] == spec['network']:
+                            break
+
+                # If we only have an addresses block, match all subnet UUIDs
+                wanted_subnet_ids = set(
+                    a['subnet'] for a in (spec.get('addresses') or ()))
+
+                actual_subnet_ids = set(
+                    a['subnet']['uuid'] for a in interface['addresses'])
+
+                if wanted_subnet_ids == actual_subnet_ids:
+                    break
+            else:
+                return False  # looped through everything without match
+
+            # Fail if any of the addresses don't match
+            for wanted_addr in (spec.get('addresses') or ()):
+
+                # Unspecified, skip
+                if 'address' not in wanted_addr:
+                    continue
+
+                addresses = set(a['address'] for a in interface['addresses'])
+                if wanted_addr['address'] not in addresses:
+                    return False
+
+            # If the wanted address is an empty list, but the actual list is
+            # not, the user wants to remove automatically set addresses
+            if spec.get('addresses') == [] and interface['addresses'] != []:
+                return False
+
+            if interface['addresses'] == [] and spec.get('addresses') != []:
+                return False
+
+            return interface
+
+        for spec in wanted:
+
+            # If there is any interface that does not match, clearly not all
+            # wanted interfaces are present
+            if not match_interface(spec):
+                return False
+
+        return True
+
+    def normalize_interfaces_param(self):
+        """ Goes through the interfaces parameter and gets it ready to be
+        sent to the API. """
+
+        for spec in (self._module.params.get('interfaces') or ()):
+            if spec['addresses'] is None:
+                del spec['addresses']
+            if spec['network'] is None:
+                del spec['network']
+
+            for address in (spec.get('addresses') or ()):
+                if address['address'] is None:
+                    del address['address']
+                if address['subnet'] is None:
+                    del address['subnet']
@@ -228,20 +228,21 @@ state:
 from ansible.module_utils.basic import (
     AnsibleModule,
 )
-from ansible.module_utils.urls import (
-    fetch_url
-)
 from ..module_utils.api import (
     AnsibleCloudscaleBase,
     cloudscale_argument_spec,
-)
-from ansible.module_utils._text import (
-    to_text
+    load_json,
 )
 
 
 class AnsibleCloudscaleCustomImage(AnsibleCloudscaleBase):
 
+    def __init__(self, module, **kwargs):
+        super(AnsibleCloudscaleCustomImage, self).__init__(module, **kwargs)
+
+        # Images are merged from two endpoints by _get, the list can't be streamed
+        self.query_strategy = 'list'
+
     def _transform_import_to_image(self, imp):
         # Create a stub image from the import
         img = imp.get('custom_image', {})
@@ -271,17 +272,10 @@ class AnsibleCloudscaleCustomImage(AnsibleCloudscaleBase):
     # AnsibleCloudscaleCustomImage._get once the API bug is fixed.
     def _get_url(self, url):
 
-        response, info = fetch_url(self._module,
-                                   url,
-                                   headers=self._auth_header,
-                                   method='GET',
-                                   timeout=self._module.params['api_timeout'])
+        response, info = self._request(url, headers=self._auth_header, stream=True)
 
         if info['status'] == 200:
-            response = self._module.from_json(
-                to_text(response.read(),
-                        errors='surrogate_or_strict'),
-            )
+            response = load_json(response)
         elif info['status'] == 404:
             # Return None to be compatible with AnsibleCloudscaleBase._get
             response = None
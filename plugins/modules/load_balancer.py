@@ -68,7 +68,9 @@ options:
     description:
       - Tags assosiated with the load balancer. Set this to C({}) to clear any tags.
     type: dict
-extends_documentation_fragment: cloudscale_ch.cloud.api_parameters
+extends_documentation_fragment:
+  - cloudscale_ch.cloud.api_parameters
+  - cloudscale_ch.cloud.api_parameters.wait
 '''
 
 EXAMPLES = '''
@@ -158,12 +160,25 @@ tags:
   returned: success
   type: dict
   sample: { 'project': 'my project' }
+wait_polls:
+  description: The number of polls made while waiting for state changes.
+  returned: when the module waited for a state change
+  type: int
+  sample: 4
+  version_added: 2.6.0
+wait_time:
+  description: The total time in seconds spent waiting for state changes.
+  returned: when the module waited for a state change
+  type: float
+  sample: 5.214
+  version_added: 2.6.0
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.api import (
     AnsibleCloudscaleBase,
     cloudscale_argument_spec,
+    cloudscale_wait_argument_spec,
 )
 
 ALLOWED_STATES = ('present',
@@ -191,14 +206,15 @@ class AnsibleCloudscaleLoadBalancer(AnsibleCloudscaleBase):
         )
 
     def create(self, resource, data=None):
-        super().create(resource)
-        if not self._module.check_mode:
+        resource = super().create(resource)
+        if not self._module.check_mode and self._module.params['wait']:
             resource = self.wait_for_state('status', ('running', ))
         return resource
 
 
 def main():
     argument_spec = cloudscale_argument_spec()
+    argument_spec.update(cloudscale_wait_argument_spec())
     argument_spec.update(dict(
         name=dict(type='str'),
         uuid=dict(type='str'),
@@ -289,12 +289,19 @@ class AnsibleCloudscaleLoadBalancerHealthMonitor(AnsibleCloudscaleBase):
             pool = self._module.params[resource_key_pool]
             if pool is not None:
 
-                resources = self._get('%s' % (self.resource_name))
+                self.query_stats = {
+                    'strategy': 'scan',
+                    'resources': 0,
+                }
+                resources = self._iter_get(self.resource_name, self.query_stats)
+
+                for health_monitor in resources or []:
+                    if health_monitor[resource_key_pool]['uuid'] == pool:
+                        matching.append(health_monitor)
 
-                if resources:
-                    for health_monitor in resources:
-                        if health_monitor[resource_key_pool]['uuid'] == pool:
-                            matching.append(health_monitor)
+                        # No need to look any further, this is going to fail
+                        if len(matching) > 1:
+                            break
 
             # Fail on more than one resource with identical name
             if len(matching) > 1:
@@ -311,57 +318,45 @@ class AnsibleCloudscaleLoadBalancerHealthMonitor(AnsibleCloudscaleBase):
         return self.pre_transform(self._resource_data)
 
     def update(self, resource):
-        updated = False
+        patch_data = dict()
         for param in self.resource_update_param_keys:
             if param == 'http' and self._module.params.get('http') is not None:
+                http_patch_data = dict()
                 for subparam in ALLOWED_HTTP_POST_PARAMS:
-                    updated = self._http_param_updated(subparam, resource) or updated
+                    http_patch_data.update(self._http_param_changes(subparam, resource))
+                if http_patch_data:
+                    patch_data['http'] = http_patch_data
             else:
-                updated = self._param_updated(param, resource) or updated
+                patch_data.update(self._param_changes(param, resource))
+
+        return self.patch_resource(resource, patch_data)
 
-        # Refresh if resource was updated in live mode
-        if updated and not self._module.check_mode:
-            resource = self.query()
-        return resource
+    def is_rebuildable(self, key, value, resource):
+        # Only the changed http fields are sent, a query is needed to get all of them
+        if key == 'http':
+            return False
+        return super(AnsibleCloudscaleLoadBalancerHealthMonitor, self).is_rebuildable(key, value, resource)
 
-    def _http_param_updated(self, key, resource):
+    def _http_param_changes(self, key, resource):
         param_http = self._module.params.get('http')
         param = param_http[key]
 
         if param is None:
-            return False
+            return dict()
 
         if not resource or key not in resource['http']:
-            return False
-
-        is_different = self.find_http_difference(key, resource, param)
-
-        if is_different:
-            self._result['changed'] = True
-
-            patch_data = {
-                'http': {
-                    key: param
-                }
-            }
-
-            before_data = {
-                'http': {
-                    key: resource['http'][key]
-                }
-            }
+            return dict()
 
-            self._result['diff']['before'].update(before_data)
-            self._result['diff']['after'].update(patch_data)
+        if not self.find_http_difference(key, resource, param):
+            return dict()
 
-            if not self._module.check_mode:
-                href = resource.get('href')
-                if not href:
-                    self._module.fail_json(msg='Unable to update %s, no href found.' % key)
+        self._result['changed'] = True
+        self._result['diff']['before'].setdefault('http', dict())[key] = resource['http'][key]
+        self._result['diff']['after'].setdefault('http', dict())[key] = param
 
-                self._patch(href, patch_data)
-                return True
-        return False
+        return {
+            key: param
+        }
 
     def find_http_difference(self, key, resource, param):
         is_different = False
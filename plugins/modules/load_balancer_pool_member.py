@@ -214,73 +214,14 @@ class AnsibleCloudscaleLoadBalancerPoolMember(AnsibleCloudscaleBase):
             ],
         )
 
-    def query(self):
-        # Initialize
-        self._resource_data = self.init_resource()
-
-        # Query by UUID
-        uuid = self._module.params[self.resource_key_uuid]
-        if uuid is not None:
-
-            # network id case
-            if "/" in uuid:
-                uuid = uuid.split("/")[0]
-
-            resource = self._get('%s/%s' % (self.resource_name, uuid))
-            if resource:
-                self._resource_data = resource
-                self._resource_data['state'] = "present"
-
-        # Query by name
-        else:
-            name = self._module.params[self.resource_key_name]
-
-            # Resource has no name field, we use a defined tag as name
-            if self.use_tag_for_name:
-                resources = self._get('%s?tag:%s=%s' % (self.resource_name, self.resource_name_tag, name))
-            else:
-                resources = self._get('%s' % self.resource_name)
-
-            matching = []
-            if resources is None:
-                self._module.fail_json(
-                    msg="The load balancer pool %s does not exist."
-                        % (self.resource_name,)
-                )
-            for resource in resources:
-                if self.use_tag_for_name:
-                    resource[self.resource_key_name] = resource['tags'].get(self.resource_name_tag)
-
-                # Skip resource if constraints is not given e.g. in case of floating_ip the ip_version differs
-                for constraint_key in self.query_constraint_keys:
-                    if self._module.params[constraint_key] is not None:
-                        if constraint_key == 'zone':
-                            resource_value = resource['zone']['slug']
-                        else:
-                            resource_value = resource[constraint_key]
-
-                        if resource_value != self._module.params[constraint_key]:
-                            break
-                else:
-                    if resource[self.resource_key_name] == name:
-                        matching.append(resource)
-
-            # Fail on more than one resource with identical name
-            if len(matching) > 1:
-                self._module.fail_json(
-                    msg="More than one %s resource with '%s' exists: %s. "
-                        "Use the '%s' parameter to identify the resource." % (
-                            self.resource_name,
-                            self.resource_key_name,
-                            name,
-                            self.resource_key_uuid
-                        )
-                )
-            elif len(matching) == 1:
-                self._resource_data = matching[0]
-                self._resource_data['state'] = "present"
-
-        return self.pre_transform(self._resource_data)
+    def query_resources(self, name):
+        resources = super(AnsibleCloudscaleLoadBalancerPoolMember, self).query_resources(name)
+        if resources is None:
+            self._module.fail_json(
+                msg="The load balancer pool %s does not exist."
+                    % (self.resource_name,)
+            )
+        return resources
 
 
 def main():
@@ -0,0 +1,643 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: servers
+short_description: Manages many servers at once on the cloudscale.ch IaaS service
+description:
+  - Create, update, start, stop and delete a set of servers on the cloudscale.ch IaaS service in one task.
+  - The servers are created, started, stopped and deleted concurrently and the module waits for all of them with a
+    single shared poll of the server list.
+notes:
+  - Servers are identified by name. If more than one server with a name exists, execution is aborted.
+  - The options given on the top level apply to all servers, unless overridden in the entry of a server in I(servers).
+  - With I(wait=false), servers created in I(state=stopped) are still waited for to be running before being stopped.
+  - Existing servers are updated the same way as with the M(cloudscale_ch.cloud.server) module. Servers updated at
+    the same time share the poll of the server list while waiting for state changes.
+author:
+  - René Moser (@resmo)
+version_added: 2.6.0
+options:
+  servers:
+    description:
+      - List of servers to manage.
+      - Each entry overrides the top level options for this server.
+      - Either I(servers) or I(count) is required.
+    type: list
+    elements: dict
+    suboptions:
+      name:
+        description:
+          - Name of the server.
+        type: str
+        required: true
+      flavor:
+        description:
+          - Flavor of the server.
+        type: str
+      image:
+        description:
+          - Image used to create the server.
+        type: str
+      zone:
+        description:
+          - Zone in which the server resides (e.g. C(lpg1) or C(rma1)).
+        type: str
+      volume_size_gb:
+        description:
+          - Initial size of the root volume in GB.
+        type: int
+      bulk_volume_size_gb:
+        description:
+          - Size of the bulk storage volume in GB.
+        type: int
+      ssh_keys:
+        description:
+          - List of SSH public keys.
+        type: list
+        elements: str
+      password:
+        description:
+          - Password for the server.
+        type: str
+      use_public_network:
+        description:
+          - Attach a public network interface to the server.
+        type: bool
+      use_private_network:
+        description:
+          - Attach a private network interface to the server.
+        type: bool
+      use_ipv6:
+        description:
+          - Enable IPv6 on the public network interface.
+        type: bool
+      interfaces:
+        description:
+          - List of network interface objects specifying the interfaces to be attached to the server.
+          - See the I(interfaces) option on the top level.
+          - Mutually exclusive with I(use_public_network) and I(use_private_network) of the same entry.
+        type: list
+        elements: dict
+        suboptions:
+          network:
+            description:
+              - Create a network interface on the network identified by UUID.
+                Use 'public' instead of an UUID to attach a public network interface.
+            type: str
+          addresses:
+            description:
+              - Attach a private network interface and configure a subnet and/or an IP address.
+            type: list
+            elements: dict
+            suboptions:
+              subnet:
+                description:
+                  - UUID of the subnet from which an address will be assigned.
+                type: str
+              address:
+                description:
+                  - The static IP address of the interface.
+                type: str
+      server_groups:
+        description:
+          - List of UUID or names of server groups.
+        type: list
+        elements: str
+      user_data:
+        description:
+          - Cloud-init configuration (cloud-config) data to use for the server.
+        type: str
+      force:
+        description:
+          - Allow to stop the running server for updating if necessary.
+        type: bool
+      tags:
+        description:
+          - Tags assosiated with the server.
+        type: dict
+  count:
+    description:
+      - Number of servers to manage, named by I(name_template).
+      - Either I(servers) or I(count) is required.
+    type: int
+  name_template:
+    description:
+      - Template for the names of the servers managed with I(count).
+      - Formatted with Python's C(str.format), C({index}) is replaced by the number of the server starting at 1.
+    type: str
+    default: 'server-{index}'
+  workers:
+    description:
+      - Maximum number of API requests sent concurrently.
+    type: int
+    default: 10
+  state:
+    description:
+      - State of the servers.
+    choices: [ running, stopped, absent ]
+    default: running
+    type: str
+  flavor:
+    description:
+      - Flavor of the servers.
+    type: str
+  image:
+    description:
+      - Image used to create the servers.
+    type: str
+  zone:
+    description:
+      - Zone in which the servers reside (e.g. C(lpg1) or C(rma1)).
+    type: str
+  volume_size_gb:
+    description:
+      - Initial size of the root volume in GB.
+      - This parameter has no effect on existing servers.
+    default: 10
+    type: int
+  bulk_volume_size_gb:
+    description:
+      - Size of the bulk storage volume in GB.
+      - No bulk storage volume if not set.
+    type: int
+  ssh_keys:
+    description:
+       - List of SSH public keys.
+       - Use the full content of your .pub file here.
+    type: list
+    elements: str
+  password:
+    description:
+       - Password for the servers.
+    type: str
+  use_public_network:
+    description:
+      - Attach a public network interface to the servers.
+    type: bool
+  use_private_network:
+    description:
+      - Attach a private network interface to the servers.
+    type: bool
+  use_ipv6:
+    description:
+      - Enable IPv6 on the public network interface.
+    default: true
+    type: bool
+  interfaces:
+    description:
+      - List of network interface objects specifying the interfaces to be attached to the servers.
+        See U(https://www.cloudscale.ch/en/api/v1/#interfaces-attribute-specification) for more details.
+    type: list
+    elements: dict
+    suboptions:
+      network:
+        description:
+          - Create a network interface on the network identified by UUID.
+            Use 'public' instead of an UUID to attach a public network interface.
+            Can be omitted if a subnet is provided under addresses.
+        type: str
+      addresses:
+        description:
+          - Attach a private network interface and configure a subnet and/or an IP address.
+        type: list
+        elements: dict
+        suboptions:
+          subnet:
+            description:
+              - UUID of the subnet from which an address will be assigned.
+            type: str
+          address:
+            description:
+              - The static IP address of the interface. Use '[]' to avoid assigning an IP address via DHCP.
+            type: str
+  server_groups:
+    description:
+      - List of UUID or names of server groups.
+    type: list
+    elements: str
+  server_group_cache_ttl:
+    description:
+      - Seconds to cache the names and UUIDs of the server groups in a file, shared by all tasks running on the same
+        host, usually the controller.
+      - The cache is keyed by the API URL and a fingerprint of the API token. It is stored in
+        C(~/.ansible/cache/cloudscale_ch) or the directory set in the C(CLOUDSCALE_CACHE_DIR) environment variable.
+      - A server group not found in the cache causes a refresh of the cache, as does a cached server group which no
+        longer exists when creating a server, or which differs from the server groups of an existing server.
+      - With C(0), the server groups are only cached for the duration of the task.
+      - If not set, the environment variable C(CLOUDSCALE_SERVER_GROUP_CACHE_TTL) is used.
+    type: int
+    default: 300
+  user_data:
+    description:
+      - Cloud-init configuration (cloud-config) data to use for the servers.
+    type: str
+  force:
+    description:
+      - Allow to stop running servers for updating if necessary.
+    default: false
+    type: bool
+  tags:
+    description:
+      - Tags assosiated with the servers. Set this to C({}) to clear any tags.
+    type: dict
+extends_documentation_fragment:
+  - cloudscale_ch.cloud.api_parameters
+  - cloudscale_ch.cloud.api_parameters.wait
+'''
+
+EXAMPLES = '''
+# Create and start ten web servers named web-01 to web-10
+- name: Start web servers
+  cloudscale_ch.cloud.servers:
+    count: 10
+    name_template: 'web-{index:02d}'
+    image: debian-13
+    flavor: flex-4-2
+    ssh_keys:
+      - ssh-rsa XXXXXXXXXX...XXXX ansible@cloudscale
+    zone: lpg1
+    api_token: xxxxxx
+  register: web
+
+# Start servers with individual flavors, sharing all other options
+- name: Start database servers
+  cloudscale_ch.cloud.servers:
+    servers:
+      - name: db-primary
+        flavor: flex-16-4
+      - name: db-replica
+        zone: rma1
+    image: debian-13
+    flavor: flex-8-2
+    ssh_keys:
+      - ssh-rsa XXXXXXXXXX...XXXX ansible@cloudscale
+    api_token: xxxxxx
+
+# Delete the web servers
+- name: Delete web servers
+  cloudscale_ch.cloud.servers:
+    count: 10
+    name_template: 'web-{index:02d}'
+    state: absent
+    api_token: xxxxxx
+'''
+
+RETURN = '''
+servers:
+  description: The servers in the order of I(servers) or their index, see the M(cloudscale_ch.cloud.server) module for the attributes.
+  returned: success
+  type: list
+  elements: dict
+  sample: [ { "uuid": "cfde831a-4e87-4a75-960f-89b0148aa2cc", "name": "web-01", "state": "running" } ]
+wait_polls:
+  description: The number of polls made while waiting for state changes.
+  returned: when the module waited for a state change
+  type: int
+  sample: 4
+wait_time:
+  description: The total time in seconds spent waiting for state changes.
+  returned: when the module waited for a state change
+  type: float
+  sample: 5.214
+'''
+
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils._text import to_native
+from ..module_utils.api import (
+    AnsibleCloudscaleApi,
+    cloudscale_argument_spec,
+    cloudscale_wait_argument_spec,
+    monotonic,
+)
+from ..module_utils.server import (
+    AnsibleCloudscaleServer,
+    AnsibleCloudscaleServerPoll,
+    cloudscale_server_argument_spec,
+    cloudscale_server_group_cache_argument_spec,
+)
+
+ALLOWED_STATES = ('running',
+                  'stopped',
+                  'absent',
+                  )
+
+
+class AnsibleCloudscaleServerSpecError(Exception):
+
+    def __init__(self, msg, **kwargs):
+        super(AnsibleCloudscaleServerSpecError, self).__init__(msg)
+        self.msg = msg
+        self.kwargs = kwargs
+
+
+class AnsibleCloudscaleServerSpecModule(object):
+    """ Stands in for the module while managing a single server, providing
+    the params of this server. Failures raise an exception instead of ending
+    the module run, so that the other servers can be handled concurrently.
+
+    """
+
+    def __init__(self, module, params):
+        self._module = module
+        self.params = params
+
+    def fail_json(self, msg, **kwargs):
+        raise AnsibleCloudscaleServerSpecError(msg, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._module, name)
+
+
+class AnsibleCloudscaleServers(AnsibleCloudscaleApi):
+
+    def __init__(self, module):
+        super(AnsibleCloudscaleServers, self).__init__(module)
+        self._result = {
+            'changed': False,
+            'diff': dict(
+                before=dict(),
+                after=dict()
+            ),
+        }
+        self._server_poll = AnsibleCloudscaleServerPoll(max_age=module.params['poll_interval'])
+        self._servers = [self._init_server(params) for params in self._get_server_params()]
+
+    def _get_server_params(self):
+        """ Returns the params of every server, merging the top level options
+        into the entries of servers or the servers generated by count.
+
+        """
+        params = self._module.params
+        if params['servers'] is not None:
+            specs = params['servers']
+        else:
+            specs = []
+            for index in range(1, params['count'] + 1):
+                specs.append({'name': params['name_template'].format(index=index)})
+
+        names = [spec['name'] for spec in specs]
+        duplicates = sorted(set(name for name in names if names.count(name) > 1))
+        if duplicates:
+            self._module.fail_json(msg="Server names must be unique: %s" % ', '.join(duplicates))
+
+        server_params = []
+        for spec in specs:
+            server = deepcopy(params)
+            del server['servers']
+
+            # Interfaces are exclusive to the network flags, given either
+            # one in the spec replaces the other from the top level
+            if spec.get('interfaces') is not None:
+                server['use_public_network'] = server['use_private_network'] = None
+            if spec.get('use_public_network') is not None or spec.get('use_private_network') is not None:
+                server['interfaces'] = None
+
+            for key, value in spec.items():
+                if value is not None:
+                    server[key] = deepcopy(value)
+            server['uuid'] = None
+            server_params.append(server)
+        return server_params
+
+    def _init_server(self, params):
+        # All servers send their requests through the client of this module
+        return AnsibleCloudscaleServer(
+            AnsibleCloudscaleServerSpecModule(self._module, params),
+            server_poll=self._server_poll,
+            client=self,
+        )
+
+    def _get_servers_by_name(self):
+        names = set(server._module.params['name'] for server in self._servers)
+
+        servers_by_name = dict()
+        for server_info in self._iter_get('servers') or ():
+            name = server_info['name']
+            if name not in names:
+                continue
+
+            if name in servers_by_name:
+                self._module.fail_json(msg="More than one server with name '%s' exists. "
+                                       "Use the server module with the 'uuid' parameter to manage "
+                                       "this server." % name)
+            servers_by_name[name] = AnsibleCloudscaleServer._transform_state(server_info)
+        return servers_by_name
+
+    def _run_concurrently(self, func, servers):
+        """ Calls func for each server within the bounded pool of workers
+        and fails with the errors of all servers, if any. Any exception of a
+        server is reported as its failure, along with the other servers.
+
+        """
+        if not servers:
+            return
+
+        with ThreadPoolExecutor(max_workers=self._module.params['workers']) as executor:
+            futures = [(server, executor.submit(func, server)) for server in servers]
+
+        errors = []
+        for server, future in futures:
+            try:
+                future.result()
+            except AnsibleCloudscaleServerSpecError as e:
+                errors.append("%s: %s" % (server._module.params['name'], e.msg))
+            except Exception as e:
+                errors.append("%s: %s" % (server._module.params['name'], to_native(e)))
+
+        if errors:
+            self._module.fail_json(msg="Failure while managing servers: %s" % ' '.join(errors),
+                                   **self.get_result())
+
+    def _wait_for_servers(self, servers, states):
+        """ Waits for all servers to reach one of the states, polling the
+        list of all servers once per interval instead of every server.
+
+        """
+        if self._module.check_mode:
+            return
+
+        servers = [s for s in servers if s._info.get('uuid') is not None]
+        if not servers:
+            return
+
+        uuids = set(s._info['uuid'] for s in servers)
+        since = monotonic()
+
+        def poll():
+            return self._server_poll.get_servers(self, since)
+
+        def done(infos):
+            for uuid in uuids:
+                if infos.get(uuid, {'state': 'absent'})['state'] not in states:
+                    return False
+            return True
+
+        infos, success = self._wait(poll, done)
+
+        pending = []
+        for server in servers:
+            uuid = server._info['uuid']
+            server._info = deepcopy(infos.get(uuid)) or {
+                'uuid': uuid,
+                'name': server._info.get('name'),
+                'state': 'absent',
+            }
+            if server._info['state'] not in states:
+                pending.append("%s (%s)" % (server._info['name'], server._info['state']))
+
+        if not success:
+            self._module.fail_json(msg="Timeout while waiting for a state change on servers to states %s: %s"
+                                       % (states, ', '.join(pending)), **self.get_result())
+
+    def _merge_wait_stats(self):
+        # Workers wait in parallel, only the longest wait adds to the time
+        seconds = 0.0
+        for server in self._servers:
+            self._wait_stats['polls'] += server._wait_stats['polls']
+            seconds = max(seconds, server._wait_stats['seconds'])
+            server._wait_stats = {'polls': 0, 'seconds': 0.0}
+        self._wait_stats['seconds'] += seconds
+
+    def present_servers(self):
+        servers_by_name = self._get_servers_by_name()
+
+        created = []
+        for server in self._servers:
+            server_info = servers_by_name.get(server._module.params['name'])
+            if server_info is None:
+                server._info = server._init_server_container()
+                created.append(server)
+            else:
+                server._info = server_info
+
+        def present(server):
+            if server in created:
+                server._create_server(server._info, wait=False)
+            else:
+                server.present_server()
+
+        self._run_concurrently(present, self._servers)
+        self._merge_wait_stats()
+
+        # Servers can only be stopped once running
+        stopped = [s for s in created if s._module.params['state'] == 'stopped']
+        self._wait_for_servers(created if self._module.params['wait'] else stopped, ('running', ))
+
+        def stop(server):
+            server._start_stop_server(server._info, target_state='stopped', wait=False)
+
+        self._run_concurrently(stop, stopped)
+        if self._module.params['wait']:
+            self._wait_for_servers(stopped, ('stopped', ))
+        elif not self._module.check_mode:
+            for server in stopped:
+                server._info['state'] = 'changing'
+
+    def absent_servers(self):
+        servers_by_name = self._get_servers_by_name()
+
+        for server in self._servers:
+            server._info = servers_by_name.get(server._module.params['name']) or server._init_server_container()
+
+        deleted = [s for s in self._servers if s._info['state'] != 'absent']
+        self._run_concurrently(lambda server: server.absent_server(wait=False), deleted)
+        if self._module.params['wait']:
+            self._wait_for_servers(deleted, ('absent', ))
+        elif not self._module.check_mode:
+            for server in deleted:
+                server._info['state'] = 'changing'
+
+    def get_result(self):
+        servers = []
+        for server in self._servers:
+            name = server._module.params['name']
+            if server._result['changed']:
+                self._result['changed'] = True
+                self._result['diff']['before'][name] = server._result['diff']['before']
+                self._result['diff']['after'][name] = server._result['diff']['after']
+            servers.append(server._info or server._init_server_container())
+
+        self._result['servers'] = servers
+        self._result.update(self.get_wait_result())
+
+        # Without keep-alive, every server opened its own connections
+        for server in self._servers:
+            self._connections_opened += server._connections_opened
+            self._responses_revalidated += server._responses_revalidated
+            server._connections_opened = server._responses_revalidated = 0
+        self._result.update(self.get_api_stats_result())
+        return self._result
+
+
+def main():
+    argument_spec = cloudscale_argument_spec()
+    argument_spec.update(cloudscale_wait_argument_spec())
+    argument_spec.update(cloudscale_server_argument_spec())
+    argument_spec.update(cloudscale_server_group_cache_argument_spec())
+    del argument_spec['name']
+
+    server_options = cloudscale_server_argument_spec()
+    for option in server_options.values():
+        # Unset options are taken from the top level
+        option.pop('default', None)
+    server_options['name']['required'] = True
+
+    argument_spec.update(dict(
+        servers=dict(
+            type='list',
+            elements='dict',
+            options=server_options,
+            mutually_exclusive=(
+                ['interfaces', 'use_public_network'],
+                ['interfaces', 'use_private_network'],
+            ),
+        ),
+        count=dict(type='int'),
+        name_template=dict(default='server-{index}'),
+        workers=dict(type='int', default=10),
+        state=dict(default='running', choices=ALLOWED_STATES),
+    ))
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        mutually_exclusive=(
+            ['servers', 'count'],
+            ['interfaces', 'use_public_network'],
+            ['interfaces', 'use_private_network'],
+        ),
+        required_one_of=(('servers', 'count'),),
+        supports_check_mode=True,
+    )
+
+    if module.params['workers'] < 1:
+        module.fail_json(msg="workers must be at least 1")
+
+    if module.params['count'] is not None:
+        try:
+            module.params['name_template'].format(index=1)
+        except (AttributeError, IndexError, KeyError, ValueError) as e:
+            module.fail_json(msg="Invalid name_template '%s': %s" % (module.params['name_template'], to_native(e)))
+
+    cloudscale_servers = AnsibleCloudscaleServers(module)
+    if module.params['state'] == "absent":
+        cloudscale_servers.absent_servers()
+    else:
+        cloudscale_servers.present_servers()
+
+    module.exit_json(**cloudscale_servers.get_result())
+
+
+if __name__ == '__main__':
+    main()
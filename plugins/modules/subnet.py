@@ -213,7 +213,7 @@ class AnsibleCloudscaleSubnet(AnsibleCloudscaleBase):
 
         elif net_param['name'] is not None:
             networks_found = []
-            networks = self._get('networks')
+            networks = self._iter_get('networks')
             for network in networks or []:
                 # Skip networks in other zones
                 if net_param['zone'] is not None and network['zone']['slug'] != net_param['zone']:
@@ -255,25 +255,19 @@ class AnsibleCloudscaleSubnet(AnsibleCloudscaleBase):
         return super(AnsibleCloudscaleSubnet, self).create(resource, data)
 
     def update(self, resource):
+        patch_data = dict()
+        for param in self.resource_update_param_keys:
+            patch_data.update(self._param_changes(param, resource))
+
         # Resets to default values by the API
         if self._module.params.get('reset'):
             for key in ('dns_servers', 'gateway_address',):
                 # No need to reset if user set the param anyway.
                 if self._module.params.get(key) is None:
                     self._result['changed'] = True
-                    patch_data = {
-                        key: None
-                    }
-                if not self._module.check_mode:
-                    href = resource.get('href')
-                    if not href:
-                        self._module.fail_json(msg='Unable to update %s, no href found.' % key)
-                    self._patch(href, patch_data, filter_none=False)
-
-            if not self._module.check_mode:
-                resource = self.query()
-
-        return super(AnsibleCloudscaleSubnet, self).update(resource)
+                    patch_data[key] = None
+
+        return self.patch_resource(resource, patch_data, filter_none=False)
 
     def get_result(self, resource):
         if resource and 'network' in resource:
@@ -77,7 +77,9 @@ options:
     description:
       - Tags associated with the volume. Set this to C({}) to clear any tags.
     type: dict
-extends_documentation_fragment: cloudscale_ch.cloud.api_parameters
+extends_documentation_fragment:
+  - cloudscale_ch.cloud.api_parameters
+  - cloudscale_ch.cloud.api_parameters.wait
 '''
 
 EXAMPLES = '''
@@ -189,12 +191,25 @@ tags:
   returned: state == present
   type: dict
   sample: { 'project': 'my project' }
+wait_polls:
+  description: The number of polls made while waiting for state changes.
+  returned: when the module waited for a state change
+  type: int
+  sample: 4
+  version_added: 2.6.0
+wait_time:
+  description: The total time in seconds spent waiting for state changes.
+  returned: when the module waited for a state change
+  type: float
+  sample: 5.214
+  version_added: 2.6.0
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.api import (
     AnsibleCloudscaleBase,
     cloudscale_argument_spec,
+    cloudscale_wait_argument_spec,
 )
 from copy import deepcopy
 
@@ -228,7 +243,10 @@ class AnsibleCloudscaleVolume(AnsibleCloudscaleBase):
         revert_url = resource['href'] + '/revert'
         revert_param = {'snapshot': self._module.params['revert']}
         revert = self._post(revert_url, revert_param)
-        result = self.wait_for_state('current_operation', False)
+        if self._module.params['wait']:
+            result = self.wait_for_state('current_operation', False)
+        else:
+            result = deepcopy(resource)
         result['changed'] = True
         result['revert'] = self._module.params['revert']
         result['diff'] = dict()
@@ -237,11 +255,14 @@ class AnsibleCloudscaleVolume(AnsibleCloudscaleBase):
         result['diff']['after'].update({
             'revert': self._module.params['revert'],
         })
+        result.update(self.get_wait_result())
+        result.update(self.get_api_stats_result())
         return result
 
 
 def main():
     argument_spec = cloudscale_argument_spec()
+    argument_spec.update(cloudscale_wait_argument_spec())
     argument_spec.update(dict(
         state=dict(type='str', default='present', choices=('present', 'absent')),
         name=dict(type='str'),
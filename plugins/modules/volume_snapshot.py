@@ -48,7 +48,9 @@ options:
     description:
       - Tags assigned to the volume snapshot. Set this to C({}) to clear any tags.
     type: dict
-extends_documentation_fragment: cloudscale_ch.cloud.api_parameters
+extends_documentation_fragment:
+  - cloudscale_ch.cloud.api_parameters
+  - cloudscale_ch.cloud.api_parameters.wait
 '''
 
 EXAMPLES = '''
@@ -124,12 +126,25 @@ tags:
   returned: state == present
   type: dict
   sample: { 'project': 'my project' }
+wait_polls:
+  description: The number of polls made while waiting for state changes.
+  returned: when the module waited for a state change
+  type: int
+  sample: 4
+  version_added: 2.6.0
+wait_time:
+  description: The total time in seconds spent waiting for state changes.
+  returned: when the module waited for a state change
+  type: float
+  sample: 5.214
+  version_added: 2.6.0
 '''
 
 from ansible.module_utils.basic import AnsibleModule
 from ..module_utils.api import (
     AnsibleCloudscaleBase,
     cloudscale_argument_spec,
+    cloudscale_wait_argument_spec,
 )
 
 
@@ -152,13 +167,16 @@ class AnsibleCloudscaleVolumeSnapshot(AnsibleCloudscaleBase):
 
     def absent(self):
         resource = super().absent()
-        if not self._module.check_mode:
+        if not self._module.check_mode and self._module.params['wait']:
             self.wait_for_state('state', 'absent')
+            resource.update(self.get_wait_result())
+            resource.update(self.get_api_stats_result())
         return resource
 
 
 def main():
     argument_spec = cloudscale_argument_spec()
+    argument_spec.update(cloudscale_wait_argument_spec())
     argument_spec.update(dict(
         name=dict(type='str'),
         uuid=dict(type='str'),
@@ -0,0 +1,276 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+DOCUMENTATION = '''
+---
+module: wait
+short_description: Waits for resources on the cloudscale.ch IaaS service to reach a state
+description:
+  - Waits for any number of resources to reach a state, polling all of them in one shared loop.
+  - Used together with I(wait=false) of modules like M(cloudscale_ch.cloud.server) to start many changes at once and
+    wait for them afterwards.
+notes:
+  - Resources of the same kind are polled with one request of their list, if more than one of them is waited for.
+  - In check mode, the module returns right away without polling, as the resources of previous tasks were not changed.
+author:
+  - René Moser (@resmo)
+version_added: 2.6.0
+options:
+  hrefs:
+    description:
+      - API URLs of the resources to wait for, as returned in C(href) by the modules.
+      - The resources need to reach one of I(states) in their I(field).
+      - Either I(hrefs) or I(resources) is required.
+    type: list
+    elements: str
+  resources:
+    description:
+      - Resources to wait for, each with its own field and states.
+      - Either I(hrefs) or I(resources) is required.
+    type: list
+    elements: dict
+    suboptions:
+      href:
+        description:
+          - API URL of the resource.
+        type: str
+        required: true
+      field:
+        description:
+          - Field of the resource holding its state.
+          - Defaults to I(field) on the top level.
+        type: str
+      states:
+        description:
+          - States of the resource to wait for.
+          - Defaults to I(states) on the top level.
+          - Required if the I(field) of the resource is C(status).
+        type: list
+        elements: str
+  field:
+    description:
+      - Field of the resources holding their state, e.g. C(status) for servers and load balancers or
+        C(current_operation) for volumes.
+    type: str
+    default: status
+  states:
+    description:
+      - States of the resources to wait for, e.g. C(running) for servers.
+      - The state C(absent) is reached once the resource does not exist anymore.
+      - Required if I(field) is C(status), as the status of a resource is never empty.
+      - If empty or not given for any other I(field), wait until the field is empty, e.g. until there is no
+        C(current_operation) on a volume.
+    type: list
+    elements: str
+  wait_timeout:
+    description:
+      - Timeout in seconds to wait for all resources to reach their state.
+      - Defaults to twice the I(api_timeout).
+      - Must be greater than 0.
+    type: int
+  poll_interval:
+    description:
+      - Initial interval in seconds between polls.
+      - The interval grows exponentially with some random jitter, up to I(poll_max_interval).
+      - Must be greater than 0.
+    default: 0.5
+    type: float
+  poll_max_interval:
+    description:
+      - Maximum interval in seconds between polls.
+      - Must be greater than 0.
+    default: 10.0
+    type: float
+extends_documentation_fragment: cloudscale_ch.cloud.api_parameters
+'''
+
+EXAMPLES = '''
+# Create servers without waiting and wait for all of them to be running
+- name: Start servers
+  cloudscale_ch.cloud.server:
+    name: 'web-{{ item }}'
+    image: debian-13
+    flavor: flex-4-2
+    ssh_keys:
+      - ssh-rsa XXXXXXXXXX...XXXX ansible@cloudscale
+    wait: false
+    api_token: xxxxxx
+  loop: [1, 2, 3]
+  register: servers
+
+- name: Wait for the servers
+  cloudscale_ch.cloud.wait:
+    hrefs: "{{ servers.results | map(attribute='href') | list }}"
+    states:
+      - running
+    api_token: xxxxxx
+
+# Wait for a volume revert and a load balancer at the same time
+- name: Wait for the revert and the load balancer
+  cloudscale_ch.cloud.wait:
+    resources:
+      - href: '{{ volume.href }}'
+        field: current_operation
+        states: []
+      - href: '{{ load_balancer.href }}'
+        states:
+          - running
+    api_token: xxxxxx
+'''
+
+RETURN = '''
+resources:
+  description:
+    - The resources in the state waited for, in the order given.
+    - A resource which does not exist is returned with its C(href) and C(absent) in the I(field) of the resource.
+  returned: success
+  type: list
+  elements: dict
+  sample: [ { "href": "https://api.cloudscale.ch/v1/servers/cfde831a-4e87-4a75-960f-89b0148aa2cc", "status": "running" } ]
+wait_polls:
+  description: The number of polls made while waiting for state changes.
+  returned: success
+  type: int
+  sample: 4
+wait_time:
+  description: The total time in seconds spent waiting for state changes.
+  returned: success
+  type: float
+  sample: 5.214
+'''
+
+from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.api import (
+    AnsibleCloudscaleApi,
+    cloudscale_argument_spec,
+    cloudscale_wait_argument_spec,
+)
+
+
+class AnsibleCloudscaleWait(AnsibleCloudscaleApi):
+
+    def __init__(self, module):
+        super(AnsibleCloudscaleWait, self).__init__(module)
+        self._resources = self._get_resources()
+
+    def _get_resources(self):
+        params = self._module.params
+
+        resources = []
+        for href in params['hrefs'] or ():
+            resources.append(dict(href=href))
+        for resource in params['resources'] or ():
+            resources.append(dict((k, v) for k, v in resource.items() if v is not None))
+
+        for resource in resources:
+            resource.setdefault('field', params['field'])
+            resource.setdefault('states', params['states'] or [])
+            if resource['field'] == 'status' and not resource['states']:
+                self._module.fail_json(msg="Missing states to wait for in the field status of %s." % resource['href'])
+
+            href = resource['href'].rstrip('/')
+            if not href.startswith(self._api_url):
+                self._module.fail_json(msg="Resource %s is not part of the API at %s." % (href, self._api_url))
+
+            # API call of the resource and of its list, e.g. servers/<uuid> and servers
+            resource['api_call'] = href[len(self._api_url):]
+            resource['list_api_call'] = resource['api_call'].rpartition('/')[0]
+        return resources
+
+    @staticmethod
+    def _has_state(resource, info):
+        if info is None:
+            return 'absent' in resource['states']
+        if not resource['states']:
+            return not info.get(resource['field'])
+        return info.get(resource['field']) in resource['states']
+
+    def _poll(self, infos):
+        """ Updates infos with the resources which did not reach their state
+        yet. Resources of the same list are fetched with one request.
+
+        """
+        pending = dict()
+        for resource in self._resources:
+            api_call = resource['api_call']
+            if api_call not in infos or not self._has_state(resource, infos[api_call]):
+                pending.setdefault(resource['list_api_call'], set()).add(api_call)
+
+        for list_api_call, api_calls in pending.items():
+            if len(api_calls) == 1:
+                api_call = api_calls.pop()
+                infos[api_call] = self._get(api_call)
+                continue
+
+            listed = dict.fromkeys(api_calls)
+            for info in self._iter_get(list_api_call) or ():
+                api_call = info.get('href', '').rstrip('/')[len(self._api_url):]
+                if api_call in listed:
+                    listed[api_call] = info
+            infos.update(listed)
+        return infos
+
+    def wait(self):
+        if self._module.check_mode:
+            return dict(changed=False, resources=[dict(href=r['href']) for r in self._resources])
+
+        infos = dict()
+        infos, success = self._wait(
+            lambda: self._poll(infos),
+            lambda infos: all(self._has_state(r, infos.get(r['api_call'])) for r in self._resources),
+        )
+
+        results = []
+        pending = []
+        for resource in self._resources:
+            info = infos.get(resource['api_call'])
+            if not self._has_state(resource, info):
+                pending.append("%s (%s: %s)" % (resource['href'], resource['field'], info.get(resource['field']) if info else 'absent'))
+            results.append(info or {'href': resource['href'], resource['field']: 'absent'})
+
+        result = dict(changed=False, resources=results)
+        result.update(self.get_wait_result())
+        result.update(self.get_api_stats_result())
+        if not success:
+            self._module.fail_json(msg="Timeout while waiting for resources: %s" % ', '.join(pending), **result)
+        return result
+
+
+def main():
+    argument_spec = cloudscale_argument_spec()
+    argument_spec.update(cloudscale_wait_argument_spec())
+    del argument_spec['wait']
+    argument_spec.update(dict(
+        hrefs=dict(type='list', elements='str'),
+        resources=dict(
+            type='list',
+            elements='dict',
+            options=dict(
+                href=dict(type='str', required=True),
+                field=dict(type='str'),
+                states=dict(type='list', elements='str'),
+            ),
+        ),
+        field=dict(type='str', default='status'),
+        states=dict(type='list', elements='str'),
+    ))
+
+    module = AnsibleModule(
+        argument_spec=argument_spec,
+        required_one_of=(('hrefs', 'resources'),),
+        supports_check_mode=True,
+    )
+
+    cloudscale_wait = AnsibleCloudscaleWait(module)
+    module.exit_json(**cloudscale_wait.wait())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+""" Benchmarks the modules against the fake API of the unit tests.
+
+Every module runs through the scenarios create, no-op, update and delete.
+For every scenario the HTTP calls and bytes sent to and received from the
+API are counted and the CPU and wall time of the module are measured, the
+times as median of all repetitions.
+
+Run it from a checkout in ansible_collections/cloudscale_ch/cloud:
+
+    python tests/benchmarks/benchmark.py --output benchmark.json \\
+        --baseline tests/benchmarks/baseline.json
+
+The exit code is 1 if a scenario needs more HTTP calls or bytes than in
+the baseline, or more time if --time-tolerance is given. Refresh the
+baseline with --output tests/benchmarks/baseline.json after intended
+changes.
+
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+try:
+    from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import FakeCloudscaleApi, run_module
+except ImportError:
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 5)))
+    from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import FakeCloudscaleApi, run_module
+
+from ansible.release import __version__ as ansible_version
+
+
+FORMAT_VERSION = 1
+
+STEPS = ('create', 'noop', 'update', 'delete')
+
+# Whether a step is expected to change something
+STEP_CHANGED = {
+    'create': True,
+    'noop': False,
+    'update': True,
+    'delete': True,
+}
+
+# Counters compared exactly, and measured times, of a scenario
+COUNTERS = ('calls', 'bytes_sent', 'bytes_received')
+TIMES = ('cpu_time', 'wall_time')
+
+SSH_KEY = 'ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIHw7TfyczLv0fHdWMbJ+ptkdCkh6zvBGYvTbNeHbhZnA ansible@cloudscale'
+
+
+def _server(api):
+    args = dict(name='web1', flavor='flex-4-2', image='debian-12', ssh_keys=[SSH_KEY], zone='lpg1')
+    return args, dict(args, tags={'env': 'bench'}), dict(name='web1', state='absent')
+
+
+def _volume(api):
+    server = api.add('servers', name='web1', flavor='flex-4-2', image='debian-12')
+    args = dict(name='data', size_gb=50, servers=[server['uuid']])
+    return args, dict(args, size_gb=100), dict(name='data', state='absent')
+
+
+def _floating_ip(api):
+    server = api.add('servers', name='web1', flavor='flex-4-2', image='debian-12')
+    other = api.add('servers', name='web2', flavor='flex-4-2', image='debian-12')
+    args = dict(name='web-ip', ip_version=4, server=server['uuid'])
+    return args, dict(args, server=other['uuid']), dict(name='web-ip', state='absent')
+
+
+def _load_balancer(api):
+    args = dict(name='lb1', flavor='lb-standard', zone='lpg1')
+    return args, dict(args, tags={'env': 'bench'}), dict(name='lb1', state='absent')
+
+
+def _load_balancer_pool(api):
+    load_balancer = api.add('load-balancers', name='lb1', flavor='lb-standard', zone='lpg1')
+    args = dict(name='pool1', load_balancer=load_balancer['uuid'], algorithm='round_robin', protocol='tcp')
+    return args, dict(args, tags={'env': 'bench'}), dict(name='pool1', state='absent')
+
+
+def _load_balancer_pool_member(api):
+    network = api.add('networks', name='backend', zone='lpg1', auto_create_ipv4_subnet=False)
+    subnet = api.add('subnets', network=network['uuid'], cidr='172.16.0.0/24')
+    load_balancer = api.add('load-balancers', name='lb1', flavor='lb-standard', zone='lpg1')
+    pool = api.add('load-balancers/pools', name='pool1', load_balancer=load_balancer['uuid'])
+    args = dict(
+        name='member1',
+        load_balancer_pool=pool['uuid'],
+        protocol_port=80,
+        monitor_port=8080,
+        subnet=subnet['uuid'],
+        address='172.16.0.10',
+    )
+    return args, dict(args, enabled=False), dict(name='member1', load_balancer_pool=pool['uuid'], state='absent')
+
+
+def _load_balancer_listener(api):
+    load_balancer = api.add('load-balancers', name='lb1', flavor='lb-standard', zone='lpg1')
+    pool = api.add('load-balancers/pools', name='pool1', load_balancer=load_balancer['uuid'])
+    args = dict(name='listener1', pool=pool['uuid'], protocol='tcp', protocol_port=80)
+    return args, dict(args, allowed_cidrs=['192.0.2.0/24']), dict(name='listener1', state='absent')
+
+
+def _load_balancer_health_monitor(api):
+    load_balancer = api.add('load-balancers', name='lb1', flavor='lb-standard', zone='lpg1')
+    pool = api.add('load-balancers/pools', name='pool1', load_balancer=load_balancer['uuid'])
+    args = dict(pool=pool['uuid'], type='tcp', delay_s=2, timeout_s=1, up_threshold=2, down_threshold=3)
+    return args, dict(args, delay_s=5), dict(pool=pool['uuid'], state='absent')
+
+
+def _custom_image(api):
+    args = dict(
+        name='my-image',
+        slug='my-image',
+        url='https://example.com/my-image.raw',
+        zones=['lpg1'],
+        user_data_handling='pass-through',
+    )
+    return args, dict(args, tags={'env': 'bench'}), dict(name='my-image', state='absent')
+
+
+# Modules benchmarked, with a function creating the resources needed and
+# returning the arguments to create, update and delete the resource
+MODULES = {
+    'server': _server,
+    'volume': _volume,
+    'floating_ip': _floating_ip,
+    'load_balancer': _load_balancer,
+    'load_balancer_pool': _load_balancer_pool,
+    'load_balancer_pool_member': _load_balancer_pool_member,
+    'load_balancer_listener': _load_balancer_listener,
+    'load_balancer_health_monitor': _load_balancer_health_monitor,
+    'custom_image': _custom_image,
+}
+
+
+def run_step(api, module, step, args):
+    """ Runs one step of a module and returns its measurements. """
+    api.clear_requests()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    result = run_module(module, args, api)
+    cpu_time = time.thread_time() - cpu_start
+    wall_time = time.perf_counter() - wall_start
+
+    if result.get('failed'):
+        raise RuntimeError('%s/%s failed: %s' % (module, step, result.get('msg')))
+    if result.get('changed') != STEP_CHANGED[step]:
+        raise RuntimeError('%s/%s: expected changed=%s, got %s' % (module, step, STEP_CHANGED[step], result.get('changed')))
+
+    methods = dict()
+    for request in api.requests:
+        methods[request['method']] = methods.get(request['method'], 0) + 1
+
+    return {
+        'calls': len(api.requests),
+        'methods': methods,
+        'bytes_sent': sum(r['request_size'] for r in api.requests),
+        'bytes_received': sum(r['response_size'] for r in api.requests),
+        'cpu_time': cpu_time,
+        'wall_time': wall_time,
+    }
+
+
+def run_module_scenarios(module, repeat, latency, gzip):
+    """ Runs the steps of a module repeat times on a fresh fake API each and
+    returns the measurements of the steps by scenario name.
+
+    """
+    runs = dict()
+    for dummy in range(repeat):
+        cache_dir = tempfile.mkdtemp(prefix='cloudscale-benchmark-')
+        os.environ['CLOUDSCALE_CACHE_DIR'] = cache_dir
+        try:
+            with FakeCloudscaleApi(latency=latency, gzip=gzip) as api:
+                create, update, delete = MODULES[module](api)
+                for step, args in zip(STEPS, (create, create, update, delete)):
+                    runs.setdefault('%s/%s' % (module, step), []).append(run_step(api, module, step, args))
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    scenarios = dict()
+    for name, measurements in runs.items():
+        # The counters of all runs are the same, but the last is warmed up
+        scenario = dict(measurements[-1])
+        for key in TIMES:
+            scenario[key] = round(statistics.median(m[key] for m in measurements), 6)
+        scenarios[name] = scenario
+    return scenarios
+
+
+def compare(results, baseline, tolerance=0.0, time_tolerance=None):
+    """ Returns the regressions of results against baseline as list of
+    messages. Counters may grow by tolerance, times by time_tolerance, if
+    given, as fraction of the baseline.
+
+    """
+    regressions = []
+    keys = [(k, tolerance) for k in COUNTERS]
+    if time_tolerance is not None:
+        keys.extend((k, time_tolerance) for k in TIMES)
+
+    for name, scenario in sorted(results['scenarios'].items()):
+        base = baseline['scenarios'].get(name)
+        if base is None:
+            continue
+        for key, allowed in keys:
+            if key in base and scenario[key] > base[key] * (1 + allowed):
+                regressions.append('%s: %s %s, baseline %s' % (name, key, scenario[key], base[key]))
+    return regressions
+
+
+def format_table(results, baseline=None):
+    header = '%-42s %6s %10s %10s %9s %9s' % ('scenario', 'calls', 'sent', 'received', 'cpu ms', 'wall ms')
+    lines = [header, '-' * len(header)]
+    for name, scenario in sorted(results['scenarios'].items()):
+        line = '%-42s %6d %10d %10d %9.1f %9.1f' % (
+            name,
+            scenario['calls'],
+            scenario['bytes_sent'],
+            scenario['bytes_received'],
+            scenario['cpu_time'] * 1000,
+            scenario['wall_time'] * 1000,
+        )
+        base = (baseline or dict(scenarios=dict()))['scenarios'].get(name)
+        if base is not None and base['calls'] != scenario['calls']:
+            line += '  (baseline %d calls)' % base['calls']
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the cloudscale.ch modules against a fake API.')
+    parser.add_argument('modules', nargs='*', help='modules to benchmark, all by default: %s' % ', '.join(sorted(MODULES)))
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each scenario (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds the fake API delays every response (default: %(default)s)')
+    parser.add_argument('--gzip', action='store_true', help='let the fake API compress its responses')
+    parser.add_argument('--output', help='file to write the results as JSON to, - for stdout')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.0,
+                        help='fraction calls and bytes may exceed the baseline (default: %(default)s)')
+    parser.add_argument('--time-tolerance', type=float,
+                        help='fraction CPU and wall time may exceed the baseline, not compared by default')
+    args = parser.parse_args(argv)
+    for module in args.modules:
+        if module not in MODULES:
+            parser.error('unknown module %s' % module)
+
+    for name in [n for n in os.environ if n.startswith('CLOUDSCALE_')]:
+        del os.environ[name]
+
+    results = {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'ansible_core': ansible_version,
+        'repeat': args.repeat,
+        'latency': args.latency,
+        'gzip': args.gzip,
+        'scenarios': dict(),
+    }
+    for module in args.modules or sorted(MODULES):
+        results['scenarios'].update(run_module_scenarios(module, args.repeat, args.latency, args.gzip))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        print(format_table(results, baseline))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance, args.time_tolerance)
+        for regression in regressions:
+            sys.stderr.write('Regression: %s\n' % regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+""" Benchmarks the inventory plugin with synthetic fleets of servers.
+
+The server lists are generated from a server of the fake API of the unit
+tests, with varying names, tags, zones, images, statuses and addresses and
+some duplicate names. They are served as prepared response from a local
+port, so that only the work of the plugin is measured.
+
+For every fleet size and config profile the parse time, the time spent
+fetching and parsing the list, the CPU time and, in a separate run, the
+peak and retained memory allocated by the plugin are reported.
+
+Run it from a checkout in ansible_collections/cloudscale_ch/cloud:
+
+    python tests/benchmarks/benchmark_inventory.py --sizes 10000 100000 \\
+        --output inventory.json
+
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ansible.plugins.loader import init_plugin_loader
+from ansible.release import __version__ as ansible_version
+
+init_plugin_loader([os.path.abspath(os.path.join(os.path.dirname(__file__), *[os.pardir] * 5))])
+
+from ansible.inventory.data import InventoryData  # noqa: E402
+from ansible.parsing.dataloader import DataLoader  # noqa: E402
+from ansible.plugins.loader import inventory_loader  # noqa: E402
+from ansible.template import Templar  # noqa: E402
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import FakeCloudscaleApi  # noqa: E402
+
+
+FORMAT_VERSION = 1
+
+API_TOKEN = 'benchmark-api-token'
+
+KEYED_GROUPS = [
+    {'prefix': 'env', 'key': 'cloudscale.tags.env'},
+    {'prefix': 'role', 'key': 'cloudscale.tags.role'},
+    {'prefix': 'zone', 'key': 'cloudscale.zone.slug'},
+    {'prefix': 'os', 'key': 'cloudscale.image.operating_system | lower'},
+    {'prefix': 'flavor', 'key': 'cloudscale.flavor.slug'},
+]
+
+GROUPS = {
+    'running': "cloudscale.status == 'running'",
+    'prod_web': "cloudscale.tags.env == 'prod' and cloudscale.tags.role == 'web'",
+}
+
+COMPOSE = {
+    'ansible_user': 'cloudscale.image.default_username',
+    'private_ip': "cloudscale.interfaces | selectattr('type', 'equalto', 'private') | map(attribute='addresses') "
+                  "| flatten | map(attribute='address') | first | default(None)",
+    'zone': 'cloudscale.zone.slug',
+}
+
+# Configs of the plugin benchmarked, besides api_url and api_token
+PROFILES = {
+    'plain': {},
+    'constructed': {
+        'compose': COMPOSE,
+        'groups': GROUPS,
+        'keyed_groups': KEYED_GROUPS,
+    },
+    'hostvar_fields': {
+        'compose': COMPOSE,
+        'groups': GROUPS,
+        'keyed_groups': KEYED_GROUPS,
+        'hostvar_fields': {
+            'include': ['name', 'uuid', 'status', 'tags', 'zone.slug', 'flavor.slug', 'image.operating_system',
+                        'image.default_username', 'interfaces.type', 'interfaces.addresses.address'],
+        },
+    },
+}
+
+ENVS = ('prod', 'staging', 'dev')
+ROLES = ('web', 'db', 'cache', 'worker')
+ZONES = ('lpg1', 'rma1')
+FLAVORS = ('flex-4-2', 'flex-8-4', 'flex-16-4', 'plus-32-8')
+IMAGES = (('debian-12', 'Debian', 'debian'), ('ubuntu-24.04', 'Ubuntu', 'ubuntu'), ('rocky-9', 'Rocky', 'rocky'))
+
+
+def make_fleet(size):
+    """ Returns size servers like the API, every 500th sharing its name
+    with the previous one.
+
+    """
+    with FakeCloudscaleApi() as api:
+        api.add('networks', name='private', zone='lpg1')
+        template = api.add('servers', name='template', flavor='flex-4-2', image='debian-12', use_private_network=True)
+        href = template['href'].rsplit('/', 1)[0]
+
+    servers = []
+    for index in range(size):
+        server = deepcopy(template)
+        server_uuid = str(uuid.UUID(int=index + 1))
+        number = index - 1 if index % 500 == 1 else index
+        image, operating_system, username = IMAGES[index % len(IMAGES)]
+        public, private = server['interfaces']
+
+        server.update({
+            'uuid': server_uuid,
+            'href': '%s/%s' % (href, server_uuid),
+            'name': 'server-%06d' % number,
+            'status': 'stopped' if index % 20 == 0 else 'running',
+            'zone': {'slug': ZONES[index % len(ZONES)]},
+            'tags': {
+                'env': ENVS[index % len(ENVS)],
+                'role': ROLES[index % len(ROLES)],
+                'team': 'team-%s' % (index % 50),
+            },
+        })
+        server['flavor'].update(slug=FLAVORS[index % len(FLAVORS)], name=FLAVORS[index % len(FLAVORS)])
+        server['image'].update(slug=image, name=image, operating_system=operating_system, default_username=username)
+        public['addresses'][0]['address'] = '198.%s.%s.%s' % (18 + (index >> 16 & 1), index >> 8 & 255, index & 255)
+        public['addresses'][1]['address'] = '2001:db8::%x' % (index + 1)
+        private['addresses'][0]['address'] = '172.%s.%s.%s' % (16 + (index >> 16 & 15), index >> 8 & 255, index & 255)
+        servers.append(server)
+    return servers
+
+
+class FleetHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    body = b'[]'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.body if self.path.split('?')[0].rstrip('/').endswith('/servers') else b'[]'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FleetServer(object):
+    """ Serves a prepared server list on a local port. """
+
+    def __init__(self, servers):
+        handler = type('Handler', (FleetHandler,), {'body': json.dumps(servers).encode()})
+        self.size = len(handler.body)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s/v1' % self._server.server_port
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def parse(config_path, timings=None):
+    """ Parses the inventory and returns it. Adds the time spent fetching
+    the server list to timings.
+
+    """
+    loader = DataLoader()
+    plugin = inventory_loader.get('cloudscale_ch.cloud.inventory')
+    plugin.templar = Templar(loader=loader)
+
+    if timings is not None:
+        get_resource_lists = plugin._get_resource_lists
+
+        def timed_get_resource_lists(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return get_resource_lists(*args, **kwargs)
+            finally:
+                timings.append(time.perf_counter() - start)
+        plugin._get_resource_lists = timed_get_resource_lists
+
+    inventory = InventoryData()
+    plugin.parse(inventory, loader, config_path, cache=False)
+    return inventory
+
+
+def run_profile(fleet, profile, repeat, workdir):
+    config_path = os.path.join(workdir, '%s.cloudscale.yml' % profile)
+    with open(config_path, 'w') as f:
+        json.dump(dict(PROFILES[profile], plugin='cloudscale_ch.cloud.inventory', api_url=fleet.url, api_token=API_TOKEN), f)
+
+    parse_times = []
+    fetch_times = []
+    cpu_times = []
+    inventory = None
+    for dummy in range(repeat):
+        inventory = None
+        gc.collect()
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        inventory = parse(config_path, fetch_times)
+        cpu_times.append(time.thread_time() - cpu_start)
+        parse_times.append(time.perf_counter() - wall_start)
+
+    hosts = len(inventory.hosts)
+    groups = len(inventory.groups)
+
+    # Memory is measured separately, tracing slows down the parsing
+    inventory = None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        inventory = parse(config_path)
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    inventory = None
+
+    parse_time = statistics.median(parse_times)
+    fetch_time = statistics.median(fetch_times)
+    return {
+        'hosts': hosts,
+        'groups': groups,
+        'parse_time': round(parse_time, 6),
+        'fetch_time': round(fetch_time, 6),
+        'host_time': round(parse_time - fetch_time, 6),
+        'cpu_time': round(statistics.median(cpu_times), 6),
+        'host_time_per_host_us': round((parse_time - fetch_time) / hosts * 1e6, 3),
+        'peak_memory': peak,
+        'retained_memory': retained,
+    }
+
+
+def format_table(results):
+    header = '%-26s %7s %6s %9s %9s %9s %10s %10s' % (
+        'scenario', 'hosts', 'groups', 'parse s', 'fetch s', 'hosts s', 'peak MiB', 'kept MiB')
+    lines = [header, '-' * len(header)]
+    for name, scenario in sorted(results['scenarios'].items(), key=lambda i: (i[0].split('/')[0], i[1]['hosts'])):
+        lines.append('%-26s %7d %6d %9.2f %9.2f %9.2f %10.1f %10.1f' % (
+            name,
+            scenario['hosts'],
+            scenario['groups'],
+            scenario['parse_time'],
+            scenario['fetch_time'],
+            scenario['host_time'],
+            scenario['peak_memory'] / 1048576.0,
+            scenario['retained_memory'] / 1048576.0,
+        ))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the cloudscale.ch inventory plugin with synthetic fleets.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='numbers of servers of the fleets (default: %(default)s)')
+    parser.add_argument('--profiles', nargs='+', default=sorted(PROFILES),
+                        help='configs of the plugin, of %s (default: all)' % ', '.join(sorted(PROFILES)))
+    parser.add_argument('--repeat', type=int, default=1, help='timed runs of each scenario (default: %(default)s)')
+    parser.add_argument('--output', help='file to write the results as JSON to, - for stdout')
+    args = parser.parse_args(argv)
+    for profile in args.profiles:
+        if profile not in PROFILES:
+            parser.error('unknown profile %s' % profile)
+
+    for name in [n for n in os.environ if n.startswith('CLOUDSCALE_')]:
+        del os.environ[name]
+
+    results = {
+        'version': FORMAT_VERSION,
+        'python': platform.python_version(),
+        'ansible_core': ansible_version,
+        'repeat': args.repeat,
+        'scenarios': dict(),
+    }
+    workdir = tempfile.mkdtemp(prefix='cloudscale-benchmark-')
+    try:
+        for size in args.sizes:
+            with FleetServer(make_fleet(size)) as fleet:
+                for profile in args.profiles:
+                    scenario = run_profile(fleet, profile, args.repeat, workdir)
+                    scenario['response_size'] = fleet.size
+                    results['scenarios']['%s/%s' % (profile, size)] = scenario
+                    sys.stderr.write('%s/%s: %.2fs\n' % (profile, size, scenario['parse_time']))
+    finally:
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        os.rmdir(workdir)
+
+    if args.output == '-':
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    else:
+        print(format_table(results))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
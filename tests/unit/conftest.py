@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import FakeCloudscaleApi
+
+
+@pytest.fixture(autouse=True)
+def cloudscale_env(monkeypatch, tmp_path):
+    """ Keeps the settings and caches of the host out of the tests. """
+    for name in ('CLOUDSCALE_API_URL', 'CLOUDSCALE_API_TOKEN', 'CLOUDSCALE_API_TIMEOUT', 'CLOUDSCALE_API_KEEP_ALIVE',
+                 'CLOUDSCALE_API_RESPONSE_CACHE', 'CLOUDSCALE_API_RETRIES', 'CLOUDSCALE_API_RATE_LIMIT',
+                 'CLOUDSCALE_API_STATS', 'CLOUDSCALE_SERVER_GROUP_CACHE_TTL'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('CLOUDSCALE_CACHE_DIR', str(tmp_path / 'cache'))
+
+
+@pytest.fixture
+def fake_api():
+    with FakeCloudscaleApi() as api:
+        yield api
+
+
+@pytest.fixture
+def server_params():
+    """ Returns the params of a new server for the server and servers
+    modules, without its name.
+
+    """
+    return {
+        'flavor': 'flex-4-2',
+        'image': 'debian-12',
+        'ssh_keys': ['ssh-ed25519 AAAA... ansible@cloudscale'],
+    }
+
+
+@pytest.fixture
+def add_server(fake_api):
+    """ Returns a factory of servers on the fake API, in their final state. """
+    def add(name='web1', **data):
+        data.setdefault('flavor', 'flex-4-2')
+        data.setdefault('image', 'debian-12')
+        return fake_api.add('servers', name=name, **data)
+    return add
@@ -0,0 +1,845 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+""" In-process stand-in for the cloudscale.ch API, to run the modules and the
+inventory plugin offline in tests and benchmarks.
+
+"""
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import contextlib
+import gzip
+import hashlib
+import importlib
+import io
+import json
+import re
+import threading
+import time
+import uuid
+
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+try:
+    from ansible.module_utils.testing import patch_module_args
+except ImportError:
+    # ansible-core < 2.19
+    patch_module_args = None
+
+
+API_TOKEN = 'fake-api-token'
+
+# API paths, e.g. load-balancers/pools/<uuid>/members/<uuid> or servers/<uuid>/start
+ROUTE = re.compile(
+    r'^(?P<collection>load-balancers/pools/[^/]+/members|[a-z-]+(?:/(?:pools|listeners|health-monitors|import))?)'
+    r'(?:/(?P<key>[^/]+))?(?:/(?P<action>[a-z]+))?/?$'
+)
+
+DNS_SERVERS = ['185.79.232.101', '185.79.232.102']
+
+
+class FakeApiError(Exception):
+
+    def __init__(self, status, body, headers=None):
+        super(FakeApiError, self).__init__(status, body)
+        self.status = status
+        self.body = body
+        self.headers = headers or dict()
+
+
+class FakeCloudscaleApi(object):
+    """ Serves the cloudscale.ch API v1 from memory on a local port.
+
+    Covers servers, server groups, volumes, volume snapshots, networks,
+    subnets, floating IPs, load balancers with their pools, members,
+    listeners and health monitors, custom images with their imports and
+    objects users.
+
+    Resources being created, started, stopped, reverted or deleted pass
+    through their intermediate state for transition seconds. Every request
+    is delayed by latency seconds. Errors like 429 or 503 are returned on
+    demand, see inject().
+
+    """
+
+    def __init__(self, transition=0.0, latency=0.0, gzip=False, etag=False, api_token=API_TOKEN):
+        self.transition = transition
+        self.latency = latency
+        self.gzip = gzip
+        self.etag = etag
+        self.api_token = api_token
+
+        self.requests = []
+        self._resources = dict()
+        self._transitions = []
+        self._faults = []
+        self._counter = 0
+        self._lock = threading.RLock()
+        self._server = None
+        self._thread = None
+
+    # Server lifecycle
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s/v1' % self._server.server_port
+
+    def start(self):
+        api = self
+
+        class Handler(FakeCloudscaleApiHandler):
+            fake_api = api
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05})
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # Test helpers
+
+    def inject(self, status, count=1, method=None, path=None, retry_after=None, handled=False):
+        """ Answers the next count requests matching the method and the
+        path prefix with the status, e.g. 429 with a Retry-After header.
+
+        If handled, the requests are carried out before, as if only their
+        responses got lost.
+
+        """
+        with self._lock:
+            for dummy in range(count):
+                self._faults.append({
+                    'status': status,
+                    'method': method,
+                    'path': path,
+                    'retry_after': retry_after,
+                    'handled': handled,
+                })
+
+    def add(self, collection, **data):
+        """ Creates a resource as if POSTed, but in its final state at once.
+        Returns the resource.
+
+        """
+        with self._lock:
+            resource = self._create(collection, data)
+            self._settle(resource)
+            return self._public(resource)
+
+    def get(self, collection, key=None):
+        """ Returns a copy of a resource or of all resources of a collection. """
+        with self._lock:
+            self._settle()
+            resources = self._resources.get(collection, dict())
+            if key is not None:
+                resource = resources.get(key)
+                return self._public(resource) if resource is not None else None
+            return [self._public(r) for r in resources.values()]
+
+    def clear_requests(self):
+        with self._lock:
+            self.requests = []
+
+    # Request handling
+
+    def handle(self, method, path, query, data):
+        """ Handles an API request and returns its status and body. """
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self._raise_fault(method, path, handled=False)
+            status, body = self._handle(method, path, query, data)
+            self._raise_fault(method, path, handled=True)
+            return status, body
+
+    def _handle(self, method, path, query, data):
+        self._settle()
+        match = ROUTE.match(path)
+        if match is None:
+            raise FakeApiError(404, {'detail': 'Not found.'})
+
+        collection, key, action = match.group('collection', 'key', 'action')
+        if collection not in BUILDERS and not collection.endswith('/members'):
+            raise FakeApiError(404, {'detail': 'Not found.'})
+
+        if action is not None:
+            if method != 'POST':
+                raise FakeApiError(405, {'detail': 'Method "%s" not allowed.' % method})
+            return 204, self._action(collection, key, action, data)
+
+        if key is None:
+            if method == 'GET':
+                return 200, self._list(collection, query)
+            if method == 'POST':
+                return 201, self._public(self._create(collection, data))
+            raise FakeApiError(405, {'detail': 'Method "%s" not allowed.' % method})
+
+        resource = self._resources.get(collection, dict()).get(key)
+        if resource is None:
+            raise FakeApiError(404, {'detail': 'Not found.'})
+
+        if method == 'GET':
+            return 200, self._public(resource)
+        if method == 'PATCH':
+            self._update(collection, resource, data)
+            return 204, None
+        if method == 'DELETE':
+            self._delete(collection, resource)
+            return 204, None
+        raise FakeApiError(405, {'detail': 'Method "%s" not allowed.' % method})
+
+    def _raise_fault(self, method, path, handled):
+        for fault in self._faults:
+            if fault['handled'] != handled:
+                continue
+            if fault['method'] not in (None, method):
+                continue
+            if fault['path'] is not None and not path.startswith(fault['path']):
+                continue
+
+            self._faults.remove(fault)
+            headers = dict()
+            if fault['retry_after'] is not None:
+                headers['Retry-After'] = str(fault['retry_after'])
+            raise FakeApiError(fault['status'], {'detail': 'Injected error.'}, headers)
+
+    def _list(self, collection, query):
+        tags = [(k[len('tag:'):], v) for k, v in query if k.startswith('tag:')]
+        result = []
+        for resource in self._resources.get(collection, dict()).values():
+            resource_tags = resource.get('tags') or dict()
+            if all(k in resource_tags and (not v or resource_tags[k] == v) for k, v in tags):
+                result.append(self._public(resource))
+        return result
+
+    # Resources
+
+    def _next(self):
+        self._counter += 1
+        return self._counter
+
+    def _href(self, collection, key):
+        return '%s/%s/%s' % (self.url, collection, key)
+
+    @staticmethod
+    def _key(collection, resource):
+        if collection == 'floating-ips':
+            return resource['network'].split('/')[0]
+        if collection == 'objects-users':
+            return resource['id']
+        return resource['uuid']
+
+    @staticmethod
+    def _public(resource):
+        return dict((k, deepcopy(v)) for k, v in resource.items() if not k.startswith('_'))
+
+    def _stub(self, collection, key, fields=('uuid', 'name')):
+        resource = self._resources.get(collection, dict()).get(key)
+        if resource is None:
+            raise FakeApiError(400, {'detail': 'The %s %s does not exist.' % (collection, key)})
+
+        stub = {'href': resource['href']}
+        for field in fields:
+            stub[field] = resource.get(field)
+        return stub
+
+    def _create(self, collection, data):
+        data = dict((k, v) for k, v in (data or dict()).items() if v is not None)
+        builder = BUILDERS.get(collection.rsplit('/', 1)[-1] if collection.endswith('/members') else collection)
+
+        resource = {
+            'uuid': str(uuid.uuid4()),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'tags': data.pop('tags', None) or dict(),
+        }
+        builder(self, collection, resource, data)
+
+        key = self._key(collection, resource)
+        resource['href'] = self._href(collection, key)
+        self._resources.setdefault(collection, dict())[key] = resource
+        return resource
+
+    def _update(self, collection, resource, data):
+        for field, value in (data or dict()).items():
+            updater = UPDATERS.get((collection, field))
+            if updater is not None:
+                updater(self, resource, value)
+            elif field not in resource:
+                raise FakeApiError(400, {field: ['Unknown field.']})
+            else:
+                resource[field] = value
+
+    def _delete(self, collection, resource):
+        key = self._key(collection, resource)
+        if collection == 'servers':
+            self._transition(resource, 'status', 'changing', None)
+            return
+        if collection == 'volume-snapshots':
+            self._transition(resource, 'status', 'deleting', None)
+            return
+        self._remove(collection, key)
+
+    def _remove(self, collection, key):
+        resource = self._resources.get(collection, dict()).pop(key, None)
+        if resource is None:
+            return
+
+        if collection == 'servers':
+            # The root volume is deleted along with the server
+            for volume in resource['volumes']:
+                self._resources.get('volumes', dict()).pop(volume['uuid'], None)
+        elif collection == 'networks':
+            for subnet in resource['subnets']:
+                self._resources.get('subnets', dict()).pop(subnet['uuid'], None)
+
+    def _action(self, collection, key, action, data):
+        resource = self._resources.get(collection, dict()).get(key)
+        if resource is None:
+            raise FakeApiError(404, {'detail': 'Not found.'})
+
+        if collection == 'servers' and action in ('start', 'stop', 'reboot'):
+            target = {'start': 'running', 'stop': 'stopped', 'reboot': 'running'}[action]
+            self._transition(resource, 'status', 'changing', target)
+            return None
+
+        if collection == 'volumes' and action == 'revert':
+            snapshot = self._resources.get('volume-snapshots', dict()).get((data or dict()).get('snapshot'))
+            if snapshot is None or snapshot['source_volume']['uuid'] != key:
+                raise FakeApiError(400, {'snapshot': ['Invalid snapshot.']})
+            self._transition(resource, 'current_operation', 'revert', None)
+            return None
+
+        raise FakeApiError(404, {'detail': 'Not found.'})
+
+    # State transitions
+
+    def _transition(self, resource, field, current, target):
+        """ Sets the field of the resource to current and to target once the
+        transition passed. A target of None on the status field removes the
+        resource.
+
+        """
+        resource[field] = current
+        self._transitions = [t for t in self._transitions if not (t[1] is resource and t[2] == field)]
+        self._transitions.append((time.time() + self.transition, resource, field, target))
+
+    def _settle(self, only=None):
+        """ Completes the transitions which passed, or all transitions of
+        the resource only at once.
+
+        """
+        now = time.time()
+        pending = []
+        for deadline, resource, field, target in self._transitions:
+            done = resource is only if only is not None else deadline <= now
+            if not done:
+                pending.append((deadline, resource, field, target))
+                continue
+
+            if callable(target):
+                target(resource)
+            elif target is None and field in ('status', 'state'):
+                for collection, resources in self._resources.items():
+                    for key, value in list(resources.items()):
+                        if value is resource:
+                            self._remove(collection, key)
+            else:
+                resource[field] = target
+        self._transitions = pending
+
+
+def _zone(data, default='lpg1'):
+    return {'slug': data.get('zone') or default}
+
+
+def _build_generic(api, collection, resource, data):
+    resource.update(data)
+
+
+def _build_interfaces(api, data, number, zone):
+    if data.get('interfaces'):
+        specs = data['interfaces']
+    else:
+        specs = []
+        if data.get('use_public_network', True):
+            specs.append({'network': 'public'})
+        if data.get('use_private_network'):
+            private = [n for n in api._resources.get('networks', dict()).values() if n['zone'] == zone]
+            if private:
+                specs.append({'network': private[0]['uuid']})
+
+    interfaces = []
+    for spec in specs:
+        if spec.get('network') == 'public':
+            addresses = [{
+                'version': 4,
+                'address': '192.0.2.%s' % (number % 254 + 1),
+                'prefix_length': 24,
+                'gateway': '192.0.2.254',
+                'reverse_ptr': '%s.example.com' % data['name'],
+                'subnet': {'uuid': 'public-v4', 'cidr': '192.0.2.0/24', 'href': None},
+            }]
+            if data.get('use_ipv6', True):
+                addresses.append({
+                    'version': 6,
+                    'address': '2001:db8::%x' % number,
+                    'prefix_length': 64,
+                    'gateway': 'fe80::1',
+                    'reverse_ptr': '%s.example.com' % data['name'],
+                    'subnet': {'uuid': 'public-v6', 'cidr': '2001:db8::/64', 'href': None},
+                })
+            interfaces.append({'type': 'public', 'addresses': addresses})
+            continue
+
+        network = api._resources.get('networks', dict()).get(spec.get('network'))
+        subnets = [a['subnet'] for a in spec.get('addresses') or () if a.get('subnet')]
+        if network is None and subnets:
+            subnet = api._resources.get('subnets', dict()).get(subnets[0])
+            network = subnet and api._resources['networks'].get(subnet['network']['uuid'])
+        if network is None:
+            raise FakeApiError(400, {'interfaces': ['Network not found.']})
+
+        addresses = []
+        if spec.get('addresses') != []:
+            for subnet_stub in network['subnets'][:1]:
+                subnet = api._resources['subnets'][subnet_stub['uuid']]
+                wanted = [a.get('address') for a in spec.get('addresses') or () if a.get('address')]
+                addresses.append({
+                    'version': 4,
+                    'address': wanted[0] if wanted else subnet['cidr'].rsplit('.', 1)[0] + '.%s' % (number % 250 + 2),
+                    'prefix_length': int(subnet['cidr'].split('/')[1]),
+                    'gateway': subnet.get('gateway_address'),
+                    'reverse_ptr': None,
+                    'subnet': {'uuid': subnet['uuid'], 'cidr': subnet['cidr'], 'href': subnet['href']},
+                })
+        interfaces.append({
+            'type': 'private',
+            'network': {'uuid': network['uuid'], 'name': network['name'], 'href': network['href']},
+            'addresses': addresses,
+        })
+    return interfaces
+
+
+def _build_server(api, collection, resource, data):
+    for field in ('name', 'flavor', 'image'):
+        if not data.get(field):
+            raise FakeApiError(400, {field: ['This field is required.']})
+
+    number = api._next()
+    zone = _zone(data)
+
+    interfaces = _build_interfaces(api, data, number, zone)
+
+    volume = api._create('volumes', {
+        'name': 'root-%s' % data['name'],
+        'size_gb': data.get('volume_size_gb') or 10,
+        'type': 'ssd',
+        'zone': zone['slug'],
+    })
+    volume['servers'] = [{'href': None, 'uuid': resource['uuid'], 'name': data['name']}]
+    volumes = [{'type': 'ssd', 'device_path': '/dev/vda', 'size_gb': volume['size_gb'], 'uuid': volume['uuid']}]
+    if data.get('bulk_volume_size_gb'):
+        volumes.append({'type': 'bulk', 'device_path': '/dev/vdb', 'size_gb': data['bulk_volume_size_gb'], 'uuid': str(uuid.uuid4())})
+
+    server_groups = [api._stub('server-groups', group) for group in data.get('server_groups') or ()]
+
+    resource.update({
+        'name': data['name'],
+        'flavor': {'slug': data['flavor'], 'name': data['flavor'], 'vcpu_count': 2, 'memory_gb': 4},
+        'image': {'slug': data['image'], 'name': data['image'], 'operating_system': 'Debian', 'default_username': 'debian'},
+        'zone': zone,
+        'volumes': volumes,
+        'interfaces': interfaces,
+        'ssh_fingerprints': [],
+        'ssh_host_keys': [],
+        'anti_affinity_with': [],
+        'server_groups': server_groups,
+        'disable_password_authentication': True,
+    })
+    for group in server_groups:
+        api._resources['server-groups'][group['uuid']]['servers'].append({'href': None, 'uuid': resource['uuid'], 'name': data['name']})
+
+    api._transition(resource, 'status', 'changing', 'running')
+
+
+def _update_server_flavor(api, resource, value):
+    if resource['status'] != 'stopped':
+        raise FakeApiError(400, {'flavor': ['The server must be stopped to change its flavor.']})
+    resource['flavor'] = {'slug': value, 'name': value, 'vcpu_count': 2, 'memory_gb': 4}
+
+
+def _update_server_interfaces(api, resource, value):
+    data = {'name': resource['name'], 'interfaces': value}
+    resource['interfaces'] = _build_interfaces(api, data, api._next(), resource['zone'])
+
+
+def _build_server_group(api, collection, resource, data):
+    resource.update({
+        'name': data.get('name'),
+        'type': data.get('type') or 'anti-affinity',
+        'zone': _zone(data),
+        'servers': [],
+    })
+
+
+def _build_volume(api, collection, resource, data):
+    for field in ('name', 'size_gb'):
+        if not data.get(field):
+            raise FakeApiError(400, {field: ['This field is required.']})
+
+    resource.update({
+        'name': data['name'],
+        'size_gb': data['size_gb'],
+        'type': data.get('type') or 'ssd',
+        'zone': _zone(data),
+        'servers': [api._stub('servers', server) for server in data.get('servers') or ()],
+        'current_operation': None,
+    })
+
+
+def _update_volume_servers(api, resource, value):
+    resource['servers'] = [api._stub('servers', server) for server in value or ()]
+
+
+def _update_volume_size(api, resource, value):
+    if value < resource['size_gb']:
+        raise FakeApiError(400, {'size_gb': ['Volumes can not be shrunk.']})
+    resource['size_gb'] = value
+
+
+def _build_volume_snapshot(api, collection, resource, data):
+    volume = api._resources.get('volumes', dict()).get(data.get('source_volume'))
+    if volume is None:
+        raise FakeApiError(400, {'source_volume': ['Volume not found.']})
+
+    resource.update({
+        'name': data.get('name'),
+        'size_gb': volume['size_gb'],
+        'source_volume': {'href': volume['href'], 'uuid': volume['uuid'], 'name': volume['name']},
+        'zone': dict(volume['zone']),
+    })
+    api._transition(resource, 'status', 'creating', 'available')
+
+
+def _build_network(api, collection, resource, data):
+    resource.update({
+        'name': data.get('name'),
+        'zone': _zone(data),
+        'mtu': data.get('mtu') or 9000,
+        'subnets': [],
+    })
+    if data.get('auto_create_ipv4_subnet', True):
+        api._resources.setdefault(collection, dict())[resource['uuid']] = resource
+        resource['href'] = api._href(collection, resource['uuid'])
+        api._create('subnets', {'cidr': '172.16.%s.0/24' % (api._next() % 256), 'network': resource['uuid']})
+
+
+def _build_subnet(api, collection, resource, data):
+    network = api._resources.get('networks', dict()).get(data.get('network'))
+    if network is None or not data.get('cidr'):
+        raise FakeApiError(400, {'network': ['Network and cidr are required.']})
+
+    resource.update({
+        'cidr': data['cidr'],
+        'network': {'href': network['href'], 'uuid': network['uuid'], 'name': network['name']},
+        'gateway_address': data.get('gateway_address'),
+        'dns_servers': data.get('dns_servers') or list(DNS_SERVERS),
+    })
+    if not any(s['uuid'] == resource['uuid'] for s in network['subnets']):
+        network['subnets'].append({'href': api._href('subnets', resource['uuid']), 'uuid': resource['uuid'], 'cidr': data['cidr']})
+
+
+def _update_subnet_dns_servers(api, resource, value):
+    resource['dns_servers'] = value if value is not None else list(DNS_SERVERS)
+
+
+def _build_floating_ip(api, collection, resource, data):
+    number = api._next()
+    if data.get('ip_version') == 6:
+        prefix_length = data.get('prefix_length') or 128
+        network = '2001:db8:1::%x/%s' % (number, prefix_length)
+    else:
+        network = '203.0.113.%s/32' % (number % 254 + 1)
+
+    del resource['uuid']
+    resource.update({
+        'network': network,
+        'ip_version': data.get('ip_version') or 4,
+        'server': api._stub('servers', data['server']) if data.get('server') else None,
+        'load_balancer': None,
+        'type': data.get('type') or 'regional',
+        'region': {'slug': data.get('region') or 'lpg'} if data.get('type') != 'global' else None,
+        'reverse_ptr': data.get('reverse_ptr') or 'fip%s.example.com' % number,
+        'next_hop': None,
+    })
+
+
+def _update_floating_ip_server(api, resource, value):
+    resource['server'] = api._stub('servers', value) if value else None
+
+
+def _build_load_balancer(api, collection, resource, data):
+    vip_addresses = []
+    for vip in data.get('vip_addresses') or [{}]:
+        subnet = api._resources.get('subnets', dict()).get(vip.get('subnet'))
+        vip_addresses.append({
+            'version': 4,
+            'address': vip.get('address') or '198.51.100.%s' % (api._next() % 254 + 1),
+            'subnet': {'href': subnet['href'], 'uuid': subnet['uuid'], 'cidr': subnet['cidr']} if subnet else
+                      {'href': None, 'uuid': 'public-v4', 'cidr': '198.51.100.0/24'},
+        })
+
+    resource.update({
+        'name': data.get('name'),
+        'flavor': {'slug': data.get('flavor') or 'lb-standard', 'name': data.get('flavor') or 'lb-standard'},
+        'zone': _zone(data),
+        'vip_addresses': vip_addresses,
+    })
+    api._transition(resource, 'status', 'changing', 'running')
+
+
+def _build_load_balancer_pool(api, collection, resource, data):
+    resource.update({
+        'name': data.get('name'),
+        'load_balancer': api._stub('load-balancers', data.get('load_balancer')),
+        'algorithm': data.get('algorithm') or 'round_robin',
+        'protocol': data.get('protocol') or 'tcp',
+    })
+
+
+def _build_load_balancer_pool_member(api, collection, resource, data):
+    pool_uuid = collection.split('/')[2]
+    subnet = api._resources.get('subnets', dict()).get(data.get('subnet'))
+    if subnet is None:
+        raise FakeApiError(400, {'subnet': ['Subnet not found.']})
+
+    resource.update({
+        'name': data.get('name'),
+        'enabled': data.get('enabled', True),
+        'pool': api._stub('load-balancers/pools', pool_uuid),
+        'protocol_port': data.get('protocol_port'),
+        'monitor_port': data.get('monitor_port'),
+        'address': data.get('address'),
+        'subnet': {'href': subnet['href'], 'uuid': subnet['uuid'], 'cidr': subnet['cidr']},
+        'monitor_status': 'up',
+    })
+    resource['load_balancer'] = deepcopy(api._resources['load-balancers/pools'][pool_uuid]['load_balancer'])
+
+
+def _build_load_balancer_listener(api, collection, resource, data):
+    resource.update({
+        'name': data.get('name'),
+        'pool': api._stub('load-balancers/pools', data['pool']) if data.get('pool') else None,
+        'protocol': data.get('protocol') or 'tcp',
+        'protocol_port': data.get('protocol_port'),
+        'allowed_cidrs': data.get('allowed_cidrs') or [],
+        'timeout_client_data_ms': data.get('timeout_client_data_ms') or 50000,
+        'timeout_member_connect_ms': data.get('timeout_member_connect_ms') or 5000,
+        'timeout_member_data_ms': data.get('timeout_member_data_ms') or 50000,
+    })
+
+
+def _build_load_balancer_health_monitor(api, collection, resource, data):
+    resource.update({
+        'pool': api._stub('load-balancers/pools', data.get('pool')),
+        'type': data.get('type') or 'tcp',
+        'delay_s': data.get('delay_s') or 2,
+        'timeout_s': data.get('timeout_s') or 1,
+        'up_threshold': data.get('up_threshold') or 2,
+        'down_threshold': data.get('down_threshold') or 3,
+        'http': data.get('http'),
+    })
+
+
+def _build_custom_image_import(api, collection, resource, data):
+    if not data.get('url') or not data.get('name'):
+        raise FakeApiError(400, {'url': ['URL and name are required.']})
+
+    image = {
+        'uuid': resource['uuid'],
+        'href': api._href('custom-images', resource['uuid']),
+        'name': data['name'],
+    }
+    resource.update({
+        'custom_image': dict(image),
+        'url': data['url'],
+        'error_message': '',
+    })
+
+    def imported(resource):
+        resource['status'] = 'success'
+        api._resources.setdefault('custom-images', dict())[image['uuid']] = dict(image, **{
+            'created_at': resource['created_at'],
+            'slug': data.get('slug'),
+            'size_gb': 1,
+            'checksums': {'md5': hashlib.md5(data['url'].encode()).hexdigest()},
+            'user_data_handling': data.get('user_data_handling') or 'pass-through',
+            'firmware_type': data.get('firmware_type') or 'bios',
+            'zones': [{'slug': zone} for zone in data.get('zones') or ['lpg1']],
+            'tags': deepcopy(resource['tags']),
+        })
+    api._transition(resource, 'status', 'in_progress', imported)
+
+
+def _build_objects_user(api, collection, resource, data):
+    del resource['uuid']
+    resource.update({
+        'id': hashlib.sha256(resource['created_at'].encode() + str(api._next()).encode()).hexdigest()[:64],
+        'display_name': data.get('display_name'),
+        'keys': [{'access_key': 'ACCESSKEY%s' % api._counter, 'secret_key': 'secret%s' % api._counter}],
+    })
+
+
+BUILDERS = {
+    'servers': _build_server,
+    'server-groups': _build_server_group,
+    'volumes': _build_volume,
+    'volume-snapshots': _build_volume_snapshot,
+    'networks': _build_network,
+    'subnets': _build_subnet,
+    'floating-ips': _build_floating_ip,
+    'load-balancers': _build_load_balancer,
+    'load-balancers/pools': _build_load_balancer_pool,
+    'members': _build_load_balancer_pool_member,
+    'load-balancers/listeners': _build_load_balancer_listener,
+    'load-balancers/health-monitors': _build_load_balancer_health_monitor,
+    'custom-images': _build_generic,
+    'custom-images/import': _build_custom_image_import,
+    'objects-users': _build_objects_user,
+}
+
+UPDATERS = {
+    ('servers', 'flavor'): _update_server_flavor,
+    ('servers', 'interfaces'): _update_server_interfaces,
+    ('volumes', 'servers'): _update_volume_servers,
+    ('volumes', 'size_gb'): _update_volume_size,
+    ('subnets', 'dns_servers'): _update_subnet_dns_servers,
+    ('floating-ips', 'server'): _update_floating_ip_server,
+}
+
+
+class FakeCloudscaleApiHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    fake_api = None
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        api = self.fake_api
+        url = urlsplit(self.path)
+        path = url.path[len('/v1/'):] if url.path.startswith('/v1/') else url.path.lstrip('/')
+
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+
+        status, result, headers = 401, {'detail': 'Invalid token.'}, dict()
+        if self.headers.get('Authorization') == 'Bearer %s' % api.api_token:
+            try:
+                data = json.loads(body) if body else None
+                status, result = api.handle(self.command, path, parse_qsl(url.query, keep_blank_values=True), data)
+            except FakeApiError as e:
+                status, result, headers = e.status, e.body, e.headers
+            except (ValueError, KeyError, TypeError) as e:
+                status, result = 400, {'detail': 'Bad request: %s' % e}
+
+        status, response, headers = self._encode(status, result, dict(headers))
+        with api._lock:
+            api.requests.append({
+                'method': self.command,
+                'path': path,
+                'query': url.query,
+                'status': status,
+                'request_size': length,
+                'response_size': len(response),
+            })
+        self._send(status, response, headers)
+
+    def _encode(self, status, result, headers):
+        """ Returns the status, body and headers of the response as sent. """
+        api = self.fake_api
+        body = json.dumps(result).encode() if result is not None else b''
+
+        if api.etag and self.command == 'GET' and status == 200:
+            headers['ETag'] = '"%s"' % hashlib.md5(body).hexdigest()
+            if self.headers.get('If-None-Match') == headers['ETag']:
+                status, body = 304, b''
+
+        if api.gzip and body and 'gzip' in (self.headers.get('Accept-Encoding') or ''):
+            buf = io.BytesIO()
+            with gzip.GzipFile(fileobj=buf, mode='wb') as f:
+                f.write(body)
+            body = buf.getvalue()
+            headers['Content-Encoding'] = 'gzip'
+        return status, body, headers
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        if body:
+            headers['Content-Type'] = 'application/json'
+        headers['Content-Length'] = str(len(body))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def run_module(name, args, api=None):
+    """ Runs the module of the collection in-process and returns its result,
+    talking to the fake API unless api_url is set in args.
+
+    """
+    args = dict(args)
+    if api is not None:
+        args.setdefault('api_url', api.url)
+        args.setdefault('api_token', api.api_token)
+
+    module = importlib.import_module('ansible_collections.cloudscale_ch.cloud.plugins.modules.%s' % name)
+    stdout = io.StringIO()
+    with _module_args(args), contextlib.redirect_stdout(stdout):
+        try:
+            module.main()
+        except SystemExit:
+            pass
+    return json.loads(stdout.getvalue())
+
+
+@contextlib.contextmanager
+def _module_args(args):
+    if patch_module_args is not None:
+        with patch_module_args(args):
+            yield
+        return
+
+    from ansible.module_utils import basic
+    from ansible.module_utils._text import to_bytes
+
+    previous = basic._ANSIBLE_ARGS
+    basic._ANSIBLE_ARGS = to_bytes(json.dumps({'ANSIBLE_MODULE_ARGS': args}))
+    try:
+        yield
+    finally:
+        basic._ANSIBLE_ARGS = previous
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import io
+
+from ansible.module_utils.six.moves.urllib.error import HTTPError
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+from ansible.module_utils.six.moves.urllib.request import Request, urlopen
+from ansible_collections.cloudscale_ch.cloud.plugins.httpapi.cloudscale import HttpApi
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils import api
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+class FakeHttpApiConnection(object):
+    """ Sends the requests of the plugin to the fake API, like the httpapi
+    connection of ansible.netcommon to its host.
+
+    """
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.base_url = '%s://%s' % (parsed.scheme, parsed.netloc)
+        self.headers = []
+
+    def send(self, path, data, method='GET', headers=None):
+        self.headers.append(headers)
+        request = Request(self.base_url + path, data=data.encode() if data is not None else None,
+                          headers=headers or {}, method=method)
+        try:
+            response = urlopen(request)
+        except HTTPError as e:
+            response = e
+        return response, io.BytesIO(response.read())
+
+
+def httpapi_plugin(fake_api, api_token):
+    """ Returns the plugin talking to the fake API, without the persistent
+    connection of ansible.netcommon.
+
+    """
+    plugin = HttpApi.__new__(HttpApi)
+    plugin.connection = FakeHttpApiConnection(fake_api.url)
+    plugin.get_option = dict(api_token=api_token).get
+    return plugin
+
+
+def test_send_request(fake_api):
+    plugin = httpapi_plugin(fake_api, fake_api.api_token)
+    group = fake_api.add('server-groups', name='group1')
+
+    response = plugin.send_request(None, path=urlparse(group['href']).path)
+
+    assert response['status'] == 200
+    assert response['headers']['content-type'] == 'application/json'
+    assert '"group1"' in response['body']
+    assert plugin.connection.headers == [{'Authorization': 'Bearer %s' % fake_api.api_token}]
+
+    response = plugin.send_request(None, path=urlparse(group['href']).path + 'x')
+    assert response['status'] == 404
+
+
+def test_module_api_token_from_connection(fake_api, monkeypatch):
+    plugin = httpapi_plugin(fake_api, fake_api.api_token)
+
+    class Connection(object):
+        def __init__(self, socket_path):
+            assert socket_path == '/tmp/socket'
+
+        def send_request(self, *args, **kwargs):
+            return plugin.send_request(*args, **kwargs)
+
+    monkeypatch.setattr(api, 'Connection', Connection)
+
+    result = run_module('server_group', {'name': 'group1', 'api_token': None, '_ansible_socket': '/tmp/socket'}, fake_api)
+
+    assert result['changed']
+    assert [g['name'] for g in fake_api.get('server-groups')] == ['group1']
+    assert plugin.connection.headers
+    assert all(h['Authorization'] == 'Bearer %s' % fake_api.api_token for h in plugin.connection.headers)
+
+
+def test_module_api_token_missing(fake_api):
+    result = run_module('server_group', {'name': 'group1', 'api_token': None}, fake_api)
+
+    assert result['failed']
+    assert result['msg'] == 'missing required arguments: api_token'
+    assert fake_api.requests == []
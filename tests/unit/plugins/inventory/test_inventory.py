@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+
+import pytest
+
+from ansible.errors import AnsibleError
+from ansible.inventory.data import InventoryData
+from ansible.parsing.dataloader import DataLoader
+from ansible.plugins.loader import inventory_loader
+from ansible.template import Templar
+from ansible_collections.cloudscale_ch.cloud.plugins.inventory import inventory as inventory_plugin
+
+
+def parse_inventory(fake_api, tmp_path, **options):
+    config = dict(options, plugin='cloudscale_ch.cloud.inventory', api_url=fake_api.url)
+    config.setdefault('api_token', fake_api.api_token)
+    path = tmp_path / 'inventory.cloudscale.yml'
+    path.write_text(json.dumps(config))
+
+    loader = DataLoader()
+    plugin = inventory_loader.get('cloudscale_ch.cloud.inventory')
+    plugin.templar = Templar(loader=loader)
+    inventory = InventoryData()
+    plugin.parse(inventory, loader, str(path), cache=False)
+    return inventory
+
+
+def test_inventory_hosts(fake_api, tmp_path, add_server):
+    fake_api.gzip = True
+    for index in range(3):
+        add_server('web%s' % index, tags={'env': 'prod'})
+    add_server('db', tags={'env': 'dev'})
+
+    inventory = parse_inventory(fake_api, tmp_path, keyed_groups=[{'key': 'cloudscale.tags.env', 'prefix': 'env'}])
+
+    assert sorted(inventory.hosts) == ['db', 'web0', 'web1', 'web2']
+    assert sorted(h.name for h in inventory.groups['env_prod'].get_hosts()) == ['web0', 'web1', 'web2']
+
+    host_vars = inventory.get_host('web0').get_vars()
+    public_v4 = fake_api.get('servers')[0]['interfaces'][0]['addresses'][0]['address']
+    assert host_vars['ansible_host'] == public_v4
+    assert host_vars['cloudscale']['flavor']['slug'] == 'flex-4-2'
+
+
+def test_inventory_duplicate_names(fake_api, tmp_path, add_server):
+    first = add_server('web')
+    second = add_server('web')
+
+    inventory = parse_inventory(fake_api, tmp_path)
+
+    assert sorted(inventory.hosts) == sorted([first['uuid'], second['uuid']])
+    assert 'web' in inventory.groups
+
+
+def test_inventory_filters(fake_api, tmp_path, add_server):
+    add_server('web1', tags={'env': 'prod'})
+    add_server('web2', tags={'env': 'dev'})
+
+    inventory = parse_inventory(fake_api, tmp_path, filters={'tags': {'env': 'prod'}})
+
+    assert list(inventory.hosts) == ['web1']
+    assert [r['query'] for r in fake_api.requests] == ['tag:env=prod']
+
+
+def test_inventory_constructed(fake_api, tmp_path, add_server):
+    add_server('web1', tags={'env': 'prod', 'project': 'shop'})
+    add_server('web2', tags={'env': 'dev'})
+
+    inventory = parse_inventory(
+        fake_api,
+        tmp_path,
+        compose={
+            'project': 'cloudscale.tags.project',
+            'env': 'cloudscale.tags.env | upper',
+            'memory_gb': 'cloudscale.flavor.memory_gb',
+            'zone': "cloudscale.zone.slug ~ '-zone'",
+        },
+        groups={'prod': "cloudscale.tags.env == 'prod'", 'shop': 'project is defined'},
+        keyed_groups=[
+            {'key': 'cloudscale.tags.project', 'prefix': 'project'},
+            {'key': 'cloudscale.image.operating_system | lower', 'prefix': 'os'},
+            {'key': 'group_names | length | string', 'prefix': 'groups'},
+        ],
+    )
+
+    web1 = inventory.get_host('web1').get_vars()
+    web2 = inventory.get_host('web2').get_vars()
+    assert (web1['project'], web1['env'], web1['memory_gb'], web1['zone']) == ('shop', 'PROD', 4, 'lpg1-zone')
+    assert 'project' not in web2
+    assert web2['env'] == 'DEV'
+
+    def hosts(group):
+        return sorted(h.name for h in inventory.groups[group].get_hosts())
+
+    assert hosts('prod') == ['web1']
+    assert hosts('shop') == ['web1']
+    assert hosts('project_shop') == ['web1']
+    assert hosts('os_debian') == ['web1', 'web2']
+    # group_names is evaluated after the host was added to the other groups
+    assert hosts('groups_4') == ['web1']
+    assert hosts('groups_1') == ['web2']
+
+
+def test_inventory_constructed_strict(fake_api, tmp_path, add_server):
+    add_server('web1', tags={'env': 'prod'})
+
+    with pytest.raises(AnsibleError, match='project'):
+        parse_inventory(fake_api, tmp_path, strict=True, keyed_groups=[{'key': 'cloudscale.tags.project', 'prefix': 'project'}])
+
+
+def test_inventory_max_workers(fake_api, tmp_path, monkeypatch, add_server):
+    add_server()
+    pools = []
+
+    class ThreadPoolExecutor(inventory_plugin.ThreadPoolExecutor):
+        def __init__(self, max_workers):
+            pools.append(max_workers)
+            super(ThreadPoolExecutor, self).__init__(max_workers)
+
+    monkeypatch.setattr(inventory_plugin, 'ThreadPoolExecutor', ThreadPoolExecutor)
+    projects = [{'api_token': fake_api.api_token, 'group_prefix': 'project%s' % index} for index in range(3)]
+    options = dict(projects=projects, include_volumes=True, include_floating_ips=True, inventory_hostname='uuid')
+
+    inventory = parse_inventory(fake_api, tmp_path, max_workers=2, **options)
+    assert pools == [2]
+    assert len(inventory.hosts) == 1
+
+    parse_inventory(fake_api, tmp_path, **options)
+    assert pools == [2, 8]
+
+    with pytest.raises(AnsibleError, match='max_workers'):
+        parse_inventory(fake_api, tmp_path, max_workers=0, **options)
+
+
+def test_inventory_address_vars_projects(fake_api, tmp_path, add_server):
+    server = add_server()
+    projects = [{'api_token': fake_api.api_token, 'group_prefix': 'project%s' % index} for index in range(2)]
+
+    inventory = parse_inventory(fake_api, tmp_path, projects=projects, address_vars=True)
+
+    # The server of both projects is added once by UUID
+    host_vars = inventory.get_host(server['uuid']).get_vars()
+    assert host_vars['cloudscale_public_v4'] == server['interfaces'][0]['addresses'][0]['address']
+
+
+def test_inventory_address_vars(fake_api, tmp_path, add_server):
+    fake_api.add('networks', name='private', zone='lpg1')
+    server = add_server('web1', use_private_network=True)
+    add_server('web2', use_ipv6=False)
+    public_v4, public_v6 = [a['address'] for a in server['interfaces'][0]['addresses']]
+    private_v4 = server['interfaces'][1]['addresses'][0]['address']
+
+    inventory = parse_inventory(
+        fake_api,
+        tmp_path,
+        ansible_host='private',
+        address_vars=True,
+        hostvar_fields={'include': ['name']},
+        groups={'private': 'cloudscale_private_ips | length > 0'},
+    )
+
+    web1 = inventory.get_host('web1').get_vars()
+    assert web1['ansible_host'] == private_v4
+    assert web1['cloudscale_public_v4'] == public_v4
+    assert web1['cloudscale_public_v6'] == public_v6
+    assert web1['cloudscale_private_v4'] == private_v4
+    assert web1['cloudscale_public_ips'] == [public_v4, public_v6]
+    assert web1['cloudscale_private_ips'] == [private_v4]
+    assert web1['cloudscale'] == {'name': 'web1'}
+
+    web2 = inventory.get_host('web2').get_vars()
+    assert 'ansible_host' not in web2
+    assert 'cloudscale_public_v6' not in web2
+    assert 'cloudscale_private_v4' not in web2
+    assert web2['cloudscale_private_ips'] == []
+    assert [h.name for h in inventory.groups['private'].get_hosts()] == ['web1']
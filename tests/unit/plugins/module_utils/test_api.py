@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import errno
+import socket
+
+import pytest
+
+from ansible.module_utils.six.moves.urllib.parse import urlparse
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils.api import AnsibleCloudscaleConnectionPool, POOL_DISCONNECTED_ERROR
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_retry_throttled_request(fake_api):
+    fake_api.inject(429, method='GET', retry_after=0)
+    fake_api.inject(429, method='POST', retry_after=0)
+
+    result = run_module('server_group', {'name': 'group1', 'api_stats': True}, fake_api)
+
+    assert result['changed']
+    assert result['api_stats']['retries'] == 2
+    assert [r['status'] for r in result['api_stats']['requests']] == [429, 200, 429, 201]
+
+
+def test_retry_transient_errors_of_idempotent_requests_only(fake_api):
+    fake_api.inject(503, method='GET')
+    fake_api.inject(503, method='POST')
+
+    result = run_module('server_group', {'name': 'group1', 'api_retries': 1}, fake_api)
+
+    assert result['failed']
+    assert result['fetch_url_info']['status'] == 503
+    assert [r['method'] for r in fake_api.requests] == ['GET', 'GET', 'POST']
+
+
+def test_retried_delete_of_deleted_resource(fake_api):
+    fake_api.add('server-groups', name='group1')
+    fake_api.inject(503, method='DELETE', handled=True)
+
+    result = run_module('server_group', {'name': 'group1', 'state': 'absent'}, fake_api)
+
+    assert result['changed']
+    assert [(r['method'], r['status']) for r in fake_api.requests][-2:] == [('DELETE', 503), ('DELETE', 404)]
+    assert fake_api.get('server-groups') == []
+
+
+def test_delete_of_missing_resource_without_retry(fake_api):
+    group = fake_api.add('server-groups', name='group1')
+    fake_api.inject(404, method='DELETE')
+
+    result = run_module('server_group', {'name': 'group1', 'state': 'absent'}, fake_api)
+
+    assert result['failed']
+    assert result['fetch_url_info']['status'] == 404
+    assert fake_api.get('server-groups', group['uuid'])
+
+
+def test_give_up_after_retries(fake_api):
+    fake_api.inject(429, count=3, retry_after=0)
+
+    result = run_module('server_group', {'name': 'group1', 'api_retries': 2}, fake_api)
+
+    assert result['failed']
+    assert len(fake_api.requests) == 3
+
+
+def test_pooled_response_close(fake_api):
+    group = fake_api.add('server-groups', name='group0')
+    pool = AnsibleCloudscaleConnectionPool(timeout=10)
+    headers = {'Authorization': 'Bearer %s' % fake_api.api_token}
+
+    # A small unread rest is drained and the connection reused
+    response, stream = pool.request('GET', group['href'], headers=headers, stream=True)
+    stream.read(10)
+    stream.close()
+    response, stream = pool.request('GET', group['href'], headers=headers, stream=True)
+    stream.close()
+    assert pool.stats == {'opened': 1, 'reused': 1}
+
+    # A large one is not transferred, the connection is closed instead
+    for index in range(1, 1000):
+        fake_api.add('server-groups', name='group%s' % index)
+    url = group['href'].rsplit('/', 1)[0]
+    response, stream = pool.request('GET', url, headers=headers, stream=True)
+    stream.read(10)
+    stream.close()
+    assert response.length > 64 * 1024
+    response, stream = pool.request('GET', url, headers=headers, stream=True)
+    stream.close()
+    assert pool.stats == {'opened': 2, 'reused': 2}
+    pool.close()
+
+
+def test_pooled_connection_closed_while_idle(fake_api):
+    group = fake_api.add('server-groups', name='group0')
+    pool = AnsibleCloudscaleConnectionPool(timeout=10)
+    headers = {'Authorization': 'Bearer %s' % fake_api.api_token}
+    netloc = urlparse(group['href']).netloc
+
+    class ClosedConnection(object):
+        def __init__(self, error):
+            self.error = error
+
+        def request(self, *args, **kwargs):
+            raise self.error
+
+        def close(self):
+            pass
+
+    # Resets and broken pipes of Python 2 and 3 are retried on a new connection
+    for error in (socket.error(errno.ECONNRESET, 'reset'), socket.error(errno.EPIPE, 'broken pipe'),
+                  POOL_DISCONNECTED_ERROR('')):
+        pool._idle[('http', netloc)] = [ClosedConnection(error)]
+        response, body = pool.request('GET', group['href'], headers=headers)
+        assert response.status == 200
+
+    pool._idle[('http', netloc)] = [ClosedConnection(socket.error(errno.ECONNREFUSED, 'refused'))]
+    with pytest.raises(socket.error):
+        pool.request('GET', group['href'], headers=headers)
+    pool.close()
+
+
+def test_gzip_responses(fake_api):
+    fake_api.gzip = True
+    for index in range(20):
+        fake_api.add('server-groups', name='group%s' % index)
+
+    result = run_module('server_group', {'name': 'group19', 'api_keep_alive': True}, fake_api)
+
+    assert not result['changed']
+    assert result['name'] == 'group19'
+
+
+def test_revalidate_responses(fake_api, add_server):
+    fake_api.etag = True
+    server = add_server()
+
+    args = {
+        'uuid': server['uuid'],
+        'name': 'web1',
+        'api_response_cache': True,
+        'api_stats': True,
+    }
+    result = run_module('server', args, fake_api)
+    assert [r['status'] for r in result['api_stats']['requests']] == [200]
+
+    result = run_module('server', args, fake_api)
+    assert [r['status'] for r in result['api_stats']['requests']] == [304]
+    assert result['uuid'] == server['uuid']
+
+
+def test_api_stats(fake_api):
+    result = run_module('server_group', {'name': 'group1', 'api_stats': True, 'api_keep_alive': True}, fake_api)
+
+    api_stats = result['api_stats']
+    assert [(r['method'], r['path'], r['status']) for r in api_stats['requests']] == [
+        ('GET', 'server-groups', 200),
+        ('POST', 'server-groups', 201),
+    ]
+    assert api_stats['request_count'] == 2
+    assert api_stats['connections'] == {'opened': 1, 'reused': 1}
+    assert api_stats['query']['strategy'] == 'scan'
+
+    result = run_module('server_group', {'name': 'group1'}, fake_api)
+    assert 'api_stats' not in result
+
+
+def test_gzip_error_responses(fake_api):
+    fake_api.gzip = True
+    fake_api.inject(400, method='GET')
+
+    result = run_module('server_group', {'name': 'group1'}, fake_api)
+
+    assert result['failed']
+    assert result['fetch_url_info']['status'] == 400
+    assert 'Injected error.' in result['fetch_url_info']['body']
+
+    fake_api.inject(400, method='POST')
+
+    result = run_module('server_group', {'name': 'group1'}, fake_api)
+
+    assert result['failed']
+    assert result['fetch_url_info']['status'] == 400
+    assert result['fetch_url_info']['msg'] != 'OK (0 bytes)'
+    assert 'Injected error.' in result['fetch_url_info']['body']
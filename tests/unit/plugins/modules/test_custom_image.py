@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+IMAGE = {
+    'name': 'my-image',
+    'slug': 'my-image',
+    'url': 'https://example.com/my-image.raw',
+    'zones': ['lpg1'],
+    'user_data_handling': 'pass-through',
+}
+
+
+def test_import_custom_image(fake_api):
+    fake_api.transition = 60
+
+    result = run_module('custom_image', IMAGE, fake_api)
+    assert result['changed']
+    assert result['import_status'] == 'in_progress'
+
+    # The import is reported until the image exists
+    result = run_module('custom_image', IMAGE, fake_api)
+    assert not result['changed']
+    assert result['import_status'] == 'in_progress'
+
+    fake_api.transition = 0
+    fake_api.add('custom-images/import', name='other', url='https://example.com/other.raw')
+    assert [i['name'] for i in fake_api.get('custom-images')] == ['other']
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import importlib
+
+import yaml
+
+
+# Modules returning the wait statistics of AnsibleCloudscaleApi.get_wait_result.
+# Doc fragments only extend DOCUMENTATION, so RETURN repeats them.
+WAIT_RESULT_MODULES = ('load_balancer', 'server', 'servers', 'volume', 'volume_snapshot', 'wait')
+
+
+def test_wait_result_docs():
+    docs = dict()
+    for name in WAIT_RESULT_MODULES:
+        module = importlib.import_module('ansible_collections.cloudscale_ch.cloud.plugins.modules.%s' % name)
+        returns = yaml.safe_load(module.RETURN)
+        for key in ('wait_polls', 'wait_time'):
+            # Only when and since when they are returned may differ
+            doc = dict((k, v) for k, v in returns[key].items() if k not in ('returned', 'version_added'))
+            assert docs.setdefault(key, doc) == doc, '%s of %s' % (key, name)
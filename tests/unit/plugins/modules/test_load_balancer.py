@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_load_balancer_with_pool_and_listener(fake_api):
+    fake_api.transition = 0.2
+
+    result = run_module('load_balancer', {'name': 'lb1', 'flavor': 'lb-standard', 'zone': 'lpg1'}, fake_api)
+    assert result['changed']
+    assert result['status'] == 'running'
+    load_balancer = result
+
+    result = run_module('load_balancer_pool', {
+        'name': 'pool1',
+        'load_balancer': load_balancer['uuid'],
+        'algorithm': 'round_robin',
+        'protocol': 'tcp',
+    }, fake_api)
+    assert result['changed']
+    pool = result
+
+    result = run_module('load_balancer_listener', {
+        'name': 'listener1',
+        'pool': pool['uuid'],
+        'protocol': 'tcp',
+        'protocol_port': 80,
+    }, fake_api)
+    assert result['changed']
+    assert result['pool']['uuid'] == pool['uuid']
+
+    result = run_module('load_balancer', {'name': 'lb1', 'flavor': 'lb-standard', 'zone': 'lpg1'}, fake_api)
+    assert not result['changed']
+
+
+def test_create_load_balancer_no_wait(fake_api):
+    fake_api.transition = 60
+
+    result = run_module('load_balancer', {'name': 'lb1', 'flavor': 'lb-standard', 'zone': 'lpg1', 'wait': False}, fake_api)
+
+    assert result['changed']
+    assert result['status'] == 'changing'
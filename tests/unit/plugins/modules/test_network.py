@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_network_and_subnet(fake_api):
+    result = run_module('network', {'name': 'private', 'zone': 'lpg1', 'auto_create_ipv4_subnet': False}, fake_api)
+    assert result['changed']
+    assert result['subnets'] == []
+    network = result
+
+    result = run_module('subnet', {
+        'cidr': '10.1.0.0/24',
+        'network': {'name': 'private'},
+        'gateway_address': '10.1.0.1',
+    }, fake_api)
+    assert result['changed']
+    assert result['network']['uuid'] == network['uuid']
+    assert result['gateway_address'] == '10.1.0.1'
+
+    result = run_module('subnet', {
+        'cidr': '10.1.0.0/24',
+        'network': {'uuid': network['uuid']},
+        'gateway_address': '10.1.0.1',
+    }, fake_api)
+    assert not result['changed']
+
+    result = run_module('network', {'name': 'private', 'zone': 'lpg1', 'mtu': 1500}, fake_api)
+    assert result['changed']
+    assert result['mtu'] == 1500
+    assert [s['cidr'] for s in result['subnets']] == ['10.1.0.0/24']
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+@pytest.fixture
+def server_args(server_params):
+    return dict(server_params, name='web1')
+
+
+def test_create_server(fake_api, server_args):
+    result = run_module('server', server_args, fake_api)
+
+    assert result['changed']
+    assert result['state'] == 'running'
+    assert fake_api.get('servers', result['uuid'])['status'] == 'running'
+
+    result = run_module('server', server_args, fake_api)
+    assert not result['changed']
+
+
+def test_create_server_check_mode(fake_api, server_args):
+    result = run_module('server', dict(server_args, _ansible_check_mode=True), fake_api)
+
+    assert result['changed']
+    assert fake_api.get('servers') == []
+
+
+def test_create_server_no_wait(fake_api, server_args):
+    fake_api.transition = 60
+    result = run_module('server', dict(server_args, wait=False), fake_api)
+
+    assert result['changed']
+    assert result['state'] == 'changing'
+    assert 'wait_polls' not in result
+
+
+def test_update_flavor_single_patch(fake_api, server_args):
+    server = run_module('server', server_args, fake_api)
+    fake_api.clear_requests()
+
+    result = run_module('server', dict(server_args, flavor='flex-8-4', tags={'env': 'test'}, force=True), fake_api)
+
+    assert result['changed']
+    assert result['state'] == 'running'
+    assert result['flavor']['slug'] == 'flex-8-4'
+    assert result['tags'] == {'env': 'test'}
+
+    changes = [(r['method'], r['path']) for r in fake_api.requests if r['method'] != 'GET']
+    assert changes == [
+        ('POST', 'servers/%s/stop' % server['uuid']),
+        ('PATCH', 'servers/%s' % server['uuid']),
+        ('POST', 'servers/%s/start' % server['uuid']),
+    ]
+
+
+def test_update_flavor_without_force(fake_api, server_args):
+    server = run_module('server', server_args, fake_api)
+    fake_api.clear_requests()
+
+    result = run_module('server', dict(server_args, flavor='flex-8-4'), fake_api)
+
+    assert not result['changed']
+    assert result['flavor']['slug'] == 'flex-4-2'
+    assert [r for r in fake_api.requests if r['method'] != 'GET'] == []
+    assert fake_api.get('servers', server['uuid'])['flavor']['slug'] == 'flex-4-2'
+
+
+def test_stop_and_delete_server(fake_api, server_args):
+    server = run_module('server', server_args, fake_api)
+
+    result = run_module('server', dict(name='web1', state='stopped'), fake_api)
+    assert result['changed']
+    assert result['state'] == 'stopped'
+
+    result = run_module('server', dict(uuid=server['uuid'], state='absent'), fake_api)
+    assert result['changed']
+    assert result['state'] == 'absent'
+    assert fake_api.get('servers') == []
+
+
+def test_server_groups_by_name(fake_api, server_args):
+    group = fake_api.add('server-groups', name='db-group')
+
+    result = run_module('server', dict(server_args, server_groups=['db-group']), fake_api)
+
+    assert [g['uuid'] for g in result['server_groups']] == [group['uuid']]
+
+
+def test_server_group_deleted_after_caching(fake_api, server_args):
+    group = fake_api.add('server-groups', name='db-group')
+    result = run_module('server', dict(server_args, name='db1', server_groups=['db-group']), fake_api)
+    assert [g['uuid'] for g in result['server_groups']] == [group['uuid']]
+
+    # The group is replaced by one of the same name after it was cached
+    run_module('server_group', dict(uuid=group['uuid'], state='absent'), fake_api)
+    stale = group
+    group = fake_api.add('server-groups', name='db-group')
+    fake_api.clear_requests()
+    result = run_module('server', dict(server_args, name='db2', server_groups=['db-group']), fake_api)
+
+    assert not result.get('failed'), result
+    assert [g['uuid'] for g in result['server_groups']] == [group['uuid']]
+    paths = [r['path'] for r in fake_api.requests if r['path'].startswith('server-groups')]
+    assert paths == ['server-groups/%s' % stale['uuid'], 'server-groups']
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils import api
+from ansible_collections.cloudscale_ch.cloud.plugins.module_utils.server import AnsibleCloudscaleServer
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_create_servers_concurrently(fake_api, server_params):
+    fake_api.transition = 0.2
+
+    result = run_module('servers', dict(server_params, count=5, name_template='web-{index}'), fake_api)
+
+    assert result['changed']
+    assert [s['name'] for s in result['servers']] == ['web-%s' % i for i in range(1, 6)]
+    assert all(s['state'] == 'running' for s in result['servers'])
+
+    # One shared poll instead of one per server
+    polls = [r for r in fake_api.requests if r['method'] == 'GET' and r['path'].startswith('servers/')]
+    assert polls == []
+
+
+def test_delete_servers(fake_api, add_server):
+    for index in range(3):
+        add_server('web-%s' % index)
+
+    result = run_module('servers', {
+        'servers': [{'name': 'web-0'}, {'name': 'web-1'}],
+        'state': 'absent',
+    }, fake_api)
+
+    assert result['changed']
+    assert [s['name'] for s in fake_api.get('servers')] == ['web-2']
+
+
+def test_invalid_name_template(fake_api):
+    for name_template in ('web-{index.foo}', 'web-{foo}', 'web-{0}', 'web-{index'):
+        result = run_module('servers', {'count': 2, 'name_template': name_template, 'flavor': 'flex-4-2'}, fake_api)
+
+        assert result['failed']
+        assert result['msg'].startswith("Invalid name_template '%s'" % name_template)
+    assert fake_api.requests == []
+
+
+def test_interfaces_and_network_flags_exclusive(fake_api):
+    result = run_module('servers', {
+        'servers': [{'name': 'web-1', 'use_public_network': True, 'interfaces': [{'network': 'public'}]}],
+        'flavor': 'flex-4-2',
+    }, fake_api)
+
+    assert result['failed']
+    assert 'mutually exclusive' in result['msg']
+    assert fake_api.requests == []
+
+
+def test_failure_of_one_server(fake_api, monkeypatch, server_params):
+    create_server = AnsibleCloudscaleServer._create_server
+
+    def failing_create_server(self, server_info, wait=True):
+        if self._module.params['name'] == 'web-2':
+            raise KeyError('interfaces')
+        return create_server(self, server_info, wait=wait)
+
+    monkeypatch.setattr(AnsibleCloudscaleServer, '_create_server', failing_create_server)
+
+    result = run_module('servers', dict(server_params, count=3, name_template='web-{index}'), fake_api)
+
+    assert result['failed']
+    assert result['msg'] == "Failure while managing servers: web-2: 'interfaces'"
+    assert result['changed']
+    assert sorted(s['name'] for s in fake_api.get('servers')) == ['web-1', 'web-3']
+
+
+def test_servers_share_one_client(fake_api, monkeypatch, server_params):
+    rate_limiters = []
+
+    class RateLimiter(api.AnsibleCloudscaleRateLimiter):
+        def __init__(self, *args, **kwargs):
+            rate_limiters.append(self)
+            super(RateLimiter, self).__init__(*args, **kwargs)
+
+    monkeypatch.setattr(api, 'AnsibleCloudscaleRateLimiter', RateLimiter)
+
+    result = run_module('servers', dict(server_params, count=3, api_rate_limit=1000, api_stats=True), fake_api)
+
+    assert result['changed']
+    assert len(rate_limiters) == 1
+    assert result['api_stats']['request_count'] == len(fake_api.requests)
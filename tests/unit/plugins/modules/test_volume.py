@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_volume_lifecycle(fake_api, add_server):
+    server = add_server()
+
+    result = run_module('volume', {'name': 'data', 'size_gb': 50, 'servers': [server['uuid']]}, fake_api)
+    assert result['changed']
+    assert [s['uuid'] for s in result['servers']] == [server['uuid']]
+
+    result = run_module('volume', {'name': 'data', 'size_gb': 100, 'servers': [server['uuid']]}, fake_api)
+    assert result['changed']
+    assert result['size_gb'] == 100
+
+    result = run_module('volume', {'name': 'data', 'size_gb': 100, 'servers': [server['uuid']]}, fake_api)
+    assert not result['changed']
+
+    result = run_module('volume', {'name': 'data', 'state': 'absent'}, fake_api)
+    assert result['changed']
+    assert [v['name'] for v in fake_api.get('volumes')] == ['root-web1']
+
+
+def test_revert_volume(fake_api):
+    fake_api.transition = 0.2
+    volume = fake_api.add('volumes', name='data', size_gb=50)
+    snapshot = fake_api.add('volume-snapshots', name='snap', source_volume=volume['uuid'])
+
+    result = run_module('volume', {'uuid': volume['uuid'], 'revert': snapshot['uuid']}, fake_api)
+
+    assert result['changed']
+    assert result['current_operation'] is None
+    assert result['wait_polls'] > 1
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright: (c) 2026, René Moser <mail@renemoser.net>
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from ansible_collections.cloudscale_ch.cloud.tests.unit.fake_api import run_module
+
+
+def test_wait_for_servers(fake_api, server_params):
+    fake_api.transition = 0.3
+    servers = [run_module('server', dict(server_params, name='web%s' % index, wait=False), fake_api) for index in range(3)]
+    assert [s['state'] for s in servers] == ['changing'] * 3
+
+    result = run_module('wait', {'hrefs': [s['href'] for s in servers], 'states': ['running']}, fake_api)
+
+    assert [r['status'] for r in result['resources']] == ['running'] * 3
+    assert result['wait_polls'] >= 1
+
+
+def test_wait_timeout(fake_api, add_server):
+    fake_api.transition = 60
+    server = add_server()
+    run_module('server', {'name': 'web1', 'state': 'stopped', 'wait': False}, fake_api)
+
+    result = run_module('wait', {'hrefs': [server['href']], 'states': ['stopped'], 'wait_timeout': 1}, fake_api)
+
+    assert result['failed']
+    assert 'Timeout' in result['msg']
+
+
+def test_wait_states_required_for_status(fake_api, add_server):
+    server = add_server()
+
+    result = run_module('wait', {'hrefs': [server['href']]}, fake_api)
+
+    assert result['failed']
+    assert 'Missing states' in result['msg']
+    assert fake_api.requests == []
+
+
+def test_wait_field_cleared(fake_api):
+    fake_api.transition = 0.3
+    volume = fake_api.add('volumes', name='data', size_gb=50)
+    snapshot = fake_api.add('volume-snapshots', name='snap', source_volume=volume['uuid'])
+    run_module('volume', {'uuid': volume['uuid'], 'revert': snapshot['uuid'], 'wait': False}, fake_api)
+    assert fake_api.get('volumes', volume['uuid'])['current_operation'] == 'revert'
+
+    result = run_module('wait', {'hrefs': [volume['href']], 'field': 'current_operation'}, fake_api)
+
+    assert not result.get('failed')
+    assert result['resources'][0]['current_operation'] is None
+
+
+def test_wait_for_absent(fake_api, add_server):
+    fake_api.transition = 0.3
+    volume = fake_api.add('volumes', name='data', size_gb=50)
+    server = add_server()
+    run_module('server', {'uuid': server['uuid'], 'state': 'absent', 'wait': False}, fake_api)
+
+    result = run_module('wait', {'resources': [
+        {'href': server['href'], 'states': ['absent']},
+        {'href': volume['href'], 'field': 'current_operation'},
+        {'href': volume['href'] + '-missing', 'field': 'current_operation', 'states': ['absent']},
+    ]}, fake_api)
+
+    assert not result.get('failed')
+    assert result['resources'][0] == {'href': server['href'], 'status': 'absent'}
+    assert result['resources'][2] == {'href': volume['href'] + '-missing', 'current_operation': 'absent'}
+
+
+def test_wait_check_mode(fake_api, add_server):
+    fake_api.transition = 60
+    server = add_server()
+    run_module('server', {'name': 'web1', 'state': 'stopped', 'wait': False}, fake_api)
+    fake_api.clear_requests()
+
+    result = run_module('wait', {'hrefs': [server['href']], 'states': ['stopped'], '_ansible_check_mode': True}, fake_api)
+
+    assert not result['changed']
+    assert result['resources'] == [{'href': server['href']}]
+    assert fake_api.requests == []
+
+
+def test_wait_invalid_intervals(fake_api, add_server):
+    server = add_server()
+
+    for param, value in (('poll_interval', -1.0), ('poll_interval', 0.0), ('poll_max_interval', 0.0), ('wait_timeout', 0)):
+        result = run_module('wait', {'hrefs': [server['href']], 'states': ['running'], param: value}, fake_api)
+
+        assert result['failed']
+        assert result['msg'] == '%s must be greater than 0, got %s.' % (param, value)
+    assert fake_api.requests == []